@@ -12,10 +12,10 @@ from app.routes.user.auth import router as user_auth_router
 
 from app.routes.admin.auth import router as admin_auth_router
 from app.routes.webhooks.revenuecat import router as webhook_router
-from app.routes.map import get_map_json
+from app.routes.map import get_map_json, get_map_changes, get_map_clusters, get_map_tile
 from app.routes.search import router as search_router
 from app.routes.search import search_stores as perform_search_stores
-from app.routes.editor import list_json_files, get_json_data, save_json_data
+from app.routes.editor import list_json_files, get_json_data, save_json_data, publish_saved_file
 
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import Response
@@ -71,9 +71,52 @@ async def dashboard():
 
 # ─── App API ────────────────────────────────────
 @app.get("/api/map/{filename}")
-async def serve_map_data(filename: str):
+async def serve_map_data(
+    filename: str,
+    request: Request,
+    bbox: str = Query(None, description="Viewport as minLng,minLat,maxLng,maxLat"),
+    limit: int = Query(None, ge=1, description="Max features for bbox queries"),
+    format: str = Query("json", pattern="^(json|columnar)$", description="Response encoding"),
+    stream: str = Query(None, pattern="^ndjson$", description="Stream one feature per line"),
+    fields: str = Query(None, description="Comma-separated properties to return")
+):
+    try:
+        return await get_map_json(filename, request, bbox, limit, format, stream, fields)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/map/{filename}/changes")
+async def serve_map_changes(
+    filename: str,
+    since: int = Query(..., ge=0, description="Data version the client already has")
+):
+    try:
+        return await get_map_changes(filename, since)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/map/{filename}/clusters")
+async def serve_map_clusters(
+    filename: str,
+    zoom: int = Query(..., ge=0, le=24, description="Map zoom level"),
+    bbox: str = Query(None, description="Viewport as minLng,minLat,maxLng,maxLat"),
+    limit: int = Query(None, ge=1, description="Max clusters/points returned")
+):
+    try:
+        return await get_map_clusters(filename, zoom, bbox, limit)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/map/tiles/{z}/{x}/{y}")
+async def serve_map_tile(z: int, x: int, y: str, request: Request):
     try:
-        return get_map_json(filename)
+        return await get_map_tile(z, x, y, request)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -83,9 +126,31 @@ async def serve_map_data(filename: str):
 async def search_stores(
     q: str = Query(None, description="Search query"),
     type: str = Query(None, description="Filter by type"),
-    tags: list[str] = Query(default=[], description="Filter by tags")
+    tags: list[str] = Query(default=[], description="Filter by tags"),
+    limit: int = Query(50, ge=0, description="Max results"),
+    format: str = Query("json", pattern="^(json|columnar)$", description="Response encoding"),
+    fields: str = Query(None, description="Comma-separated result fields to return"),
+    fuzzy: bool = Query(False, description="Also match titles with typos in the query"),
+    facets: bool = Query(True, description="Include per-facet counts of all matches"),
+    tags_mode: str = Query("any", pattern="^(any|all)$", description="Match any or all of tags/producttags"),
+    exclude_tags: list[str] = Query(default=[], description="Drop stores with any of these tags"),
+    producttags: list[str] = Query(default=[], description="Filter by product tags"),
+    near: str = Query(None, description="Search around lat,lng"),
+    radius_m: float = Query(None, gt=0, description="Only stores within this many meters of near"),
+    sort: str = Query("relevance", pattern="^(relevance|distance)$", description="Result order"),
+    open_now: bool = Query(False, description="Only stores open right now"),
+    open_at: str = Query(None, description="Only stores open at this ISO 8601 time (UTC if no offset)"),
+    cursor: str = Query(None, description="next_cursor of the previous page"),
+    collection: list[str] = Query(default=[], description="Only stores in these map files (e.g. collectionA)"),
+    product: str = Query(None, description="Only stores with a menu item matching these words"),
+    min_price: float = Query(None, ge=0, description="Lowest menu price, in currency"),
+    max_price: float = Query(None, ge=0, description="Highest menu price, in currency"),
+    currency: str = Query(None, pattern="^[A-Za-z]{3}$", description="ISO 4217 code of the price range, e.g. TWD")
 ):
-    return await perform_search_stores(q, type, tags)
+    return await perform_search_stores(q, type, tags, limit, format, fields, fuzzy, facets,
+                                       tags_mode, exclude_tags, producttags, near, radius_m, sort,
+                                       open_now, open_at, cursor, collection,
+                                       product, min_price, max_price, currency)
 
 # ─── TEMPORARY UNPROTECTED ROUTES (REMOVE AFTER TESTING) ─────────────────────
 @app.get("/api/admin/auth/json-files")
@@ -106,6 +171,7 @@ async def temp_save_json_data(filename: str, request: Request):
     try:
         data = await request.json()
         new_filename = save_json_data(filename, data)
+        await publish_saved_file(new_filename)
         return {
             "message": "JSON file updated successfully",
             "filename": new_filename
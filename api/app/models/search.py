@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+# Upper bound on ids per bulk request
+MAX_STATUS_IDS = 1000
+# Upper bound on searches per batch request
+MAX_BATCH_SEARCHES = 20
+
+class OpenStatusRequest(BaseModel):
+    ids: List[str] = Field(..., max_length=MAX_STATUS_IDS)
+    # ISO 8601 time to check instead of now; UTC if no offset
+    at: Optional[str] = None
+
+class SearchSpec(BaseModel):
+    """One search of a batch: the query parameters of GET /api/search"""
+    q: Optional[str] = None
+    type: Optional[str] = None
+    tags: Optional[List[str]] = None
+    limit: Optional[int] = Field(50, ge=0)
+    format: str = Field("json", pattern="^(json|columnar)$")
+    fields: Optional[str] = None
+    fuzzy: bool = False
+    facets: bool = True
+    tags_mode: str = Field("any", pattern="^(any|all)$")
+    exclude_tags: Optional[List[str]] = None
+    producttags: Optional[List[str]] = None
+    near: Optional[str] = None
+    radius_m: Optional[float] = Field(None, gt=0)
+    sort: str = Field("relevance", pattern="^(relevance|distance)$")
+    open_now: bool = False
+    open_at: Optional[str] = None
+    cursor: Optional[str] = None
+    collection: Optional[List[str]] = None
+    product: Optional[str] = None
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, ge=0)
+    currency: Optional[str] = Field(None, pattern="^[A-Za-z]{3}$")
+
+class BatchSearchRequest(BaseModel):
+    searches: List[SearchSpec] = Field(..., min_length=1, max_length=MAX_BATCH_SEARCHES)
@@ -3,7 +3,8 @@ from fastapi.security import HTTPBasic, HTTPBasicCredentials
 import os
 import secrets
 from dotenv import load_dotenv
-from ..editor import list_json_files, get_json_data, save_json_data
+from ..editor import list_json_files, get_json_data, save_json_data, publish_saved_file
+from ..search import clear_search_cache
 
 load_dotenv()
 
@@ -74,6 +75,7 @@ async def save_json_endpoint(filename: str, request: Request, admin: str = Depen
     try:
         data = await request.json()
         new_filename = save_json_data(filename, data)
+        await publish_saved_file(new_filename)
         return {
             "message": "JSON file updated successfully",
             "filename": new_filename
@@ -81,4 +83,12 @@ async def save_json_endpoint(filename: str, request: Request, admin: str = Depen
     except HTTPException as e:
         raise e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/search/reload")
+async def reload_search_endpoint(admin: str = Depends(verify_admin)):
+    """Rebuild the search indexes from meta.json now; reports the build time
+
+    Saves through /save promote the edited file and reload search by themselves.
+    """
+    return await clear_search_cache()
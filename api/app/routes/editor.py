@@ -1,10 +1,15 @@
 import os
 import json
+import shutil
 from fastapi import HTTPException, UploadFile, File
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any, List
 
+from app.routes.search import schedule_search_reload
+from app.services.map_cache import map_cache
+from app.services.vector_tiles import TILE_SOURCES, tile_cache
+
 # Load environment variables
 from dotenv import load_dotenv
 load_dotenv('../.env.local')
@@ -52,24 +57,28 @@ def get_json_data(filename: str) -> Dict[str, Any]:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading file: {str(e)}")
 
+def base_name_of(filename: str) -> str:
+    """Map file name without .json or an editor save timestamp: meta_1018T120000.json -> meta"""
+    # Remove .json extension if present
+    if filename.endswith('.json'):
+        filename = filename[:-5]
+
+    # Handle existing timestamps in filename
+    if '_' in filename:
+        parts = filename.rsplit('_', 1)
+        # Check if the last part looks like a timestamp (11 characters: MMDDTHHMMSS)
+        if len(parts) == 2 and len(parts[1]) == 11 and parts[1][4] == 'T':
+            return parts[0]
+    return filename
+
 def save_json_data(filename: str, data: Dict[str, Any]) -> str:
-    """Save JSON data directly without reconstruction"""
+    """Save JSON data as a timestamped copy and promote it to the map file it edits"""
     try:
-        # Remove .json extension if present
-        if filename.endswith('.json'):
-            filename = filename[:-5]
-        
+        base_name = base_name_of(filename)
+
         # Generate timestamp
         timestamp = datetime.utcnow().strftime("_%m%dT%H%M%S")
         
-        # Handle existing timestamps in filename
-        base_name = filename
-        if '_' in filename:
-            parts = filename.rsplit('_', 1)
-            # Check if the last part looks like a timestamp (11 characters: MMDDTHHMMSS)
-            if len(parts) == 2 and len(parts[1]) == 11 and parts[1][4] == 'T':
-                base_name = parts[0]
-        
         # Create new filename with timestamp
         new_filename = f"{base_name}{timestamp}.json"
         
@@ -77,9 +86,30 @@ def save_json_data(filename: str, data: Dict[str, Any]) -> str:
         full_path = JSON_PATH / new_filename
         with open(full_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
+
+        # Promote: the map, tiles, delta sync and search all read {base_name}.json,
+        # and the timestamped copy stays behind as history. Replaced in one step so
+        # readers never see a half-written file.
+        staging = JSON_PATH / f"{base_name}.json.tmp"
+        shutil.copyfile(full_path, staging)
+        os.replace(staging, JSON_PATH / f"{base_name}.json")
         
-        print(f"Saved file: {new_filename}")
+        print(f"Saved file: {new_filename} (promoted to {base_name}.json)")
         return new_filename
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
+
+async def publish_saved_file(filename: str):
+    """Bring what is served from a map file up to date right after a save promoted it"""
+    promoted = f"{base_name_of(filename)}.json"
+    try:
+        # Reloading now records the edit in the file's change log, so /changes?since=
+        # reports it even if nothing fetched the map in between
+        await map_cache.get(promoted)
+    except HTTPException as e:
+        print(f"[editor] Could not reload {promoted}: {e.detail}")
+    if promoted in TILE_SOURCES.values():
+        # Tiles of the old data, in memory and on disk, are dropped now
+        await tile_cache.refresh()
+    schedule_search_reload()
@@ -1,27 +1,169 @@
-from fastapi import APIRouter
-import os
-import json
-from pathlib import Path
-from fastapi.responses import JSONResponse
-from fastapi import HTTPException
+import asyncio
+from itertools import chain
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from app.services import columnar
+from app.services.feature_stream import iter_ndjson
+from app.services.field_projection import build_projection_cache, parse_fields, project_feature
+from app.services.map_cache import encode_json, map_cache
+from app.services.map_changes import feature_id
+from app.services.point_clusters import MAX_ZOOM as CLUSTER_MAX_ZOOM, build_cluster_index
+from app.services.spatial_index import parse_bbox
+from app.services.vector_tiles import MEDIA_TYPE as TILE_MEDIA_TYPE, tile_cache
+from app.utils.http_cache import EncodedBody, encoded_response
 
 router = APIRouter()
 
+
+def _build_features_by_id(asset) -> Dict[str, Dict[str, Any]]:
+    by_id = {}
+    for feature in asset.features:
+        key = feature_id(feature)
+        if key is not None:
+            by_id[key] = feature
+    return by_id
+
+
+def _build_columnar(asset) -> EncodedBody:
+    return EncodedBody(encode_json(columnar.encode_features(asset.features)))
+
+
+def _build_projection(asset, format: str, fields) -> EncodedBody:
+    features = [project_feature(feature, fields) for feature in asset.features]
+    if format == columnar.FORMAT_NAME:
+        return EncodedBody(encode_json(columnar.encode_features(features)))
+    return EncodedBody(encode_json({"type": "FeatureCollection", "features": features}))
+
+
 @router.get("/map/{filename}")
-def get_map_json(filename: str):
-    # Ensure only .json files are allowed
-    if not filename.endswith(".json"):
-        raise HTTPException(status_code=400, detail="Only .json files are supported.")
+async def get_map_json(
+    filename: str,
+    request: Request,
+    bbox: Optional[str] = Query(None, description="Viewport as minLng,minLat,maxLng,maxLat"),
+    limit: Optional[int] = Query(None, ge=1, description="Max features for bbox queries"),
+    format: str = Query("json", pattern="^(json|columnar)$", description="Response encoding"),
+    stream: Optional[str] = Query(None, pattern="^ndjson$", description="Stream one feature per line"),
+    fields: Optional[str] = Query(None, description="Comma-separated properties to return"),
+):
+    if stream is not None:
+        return await _stream_ndjson(filename)
+
+    try:
+        projection = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid fields: {str(e)}")
+
+    # Parsing, encoding and compression happen once per file version in map_cache
+    asset = await map_cache.get(filename)
+    if bbox is None:
+        if projection is not None:
+            # Projected bodies are cached per data version like the full one
+            projections = await asset.derived("projections", build_projection_cache)
+            key = (format, projection)
+            encoded = projections.get(key)
+            if encoded is None:
+                encoded = await asyncio.to_thread(_build_projection, asset, format, projection)
+                projections.put(key, encoded)
+            return encoded_response(request, encoded, asset.last_modified)
+        if format == columnar.FORMAT_NAME:
+            # Columnar body (and its compressed variants) is cached next to the JSON
+            encoded = await asset.derived("columnar", _build_columnar)
+            return encoded_response(request, encoded, asset.last_modified)
+        return encoded_response(request, asset.encoded, asset.last_modified)
+
+    try:
+        viewport = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {str(e)}")
+
+    features = asset.features
+    selected = [features[ordinal] for ordinal in asset.spatial_index.query(viewport, limit)]
+    if projection is not None:
+        selected = [project_feature(feature, projection) for feature in selected]
+    if format == columnar.FORMAT_NAME:
+        return JSONResponse(content=columnar.encode_features(selected))
+    return JSONResponse(content={
+        "type": "FeatureCollection",
+        "features": selected,
+    })
 
-    base_path = Path(__file__).resolve().parent.parent.parent / "assets" / "map"
-    file_path = base_path / filename
 
-    if not file_path.exists():
+async def _stream_ndjson(filename: str) -> StreamingResponse:
+    """Stream a FeatureCollection straight from disk, one feature per line"""
+    file_path = map_cache.resolve(filename)
+    if not file_path.is_file():
         raise HTTPException(status_code=404, detail="File not found.")
 
+    # Pull the first chunk up front so a file that is broken from the start still gets a 500
+    chunks = iter_ndjson(file_path)
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return JSONResponse(content=data)
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=500, detail="Invalid JSON file.")
\ No newline at end of file
+        first = await asyncio.to_thread(next, chunks, b"")
+    except ValueError:
+        raise HTTPException(status_code=500, detail="Invalid JSON file.")
+
+    return StreamingResponse(chain((first,), chunks), media_type="application/x-ndjson")
+
+
+@router.get("/map/{filename}/changes")
+async def get_map_changes(
+    filename: str,
+    since: int = Query(..., ge=0, description="Data version the client already has"),
+):
+    asset = await map_cache.get(filename)
+    diff = map_cache.changes(filename).diff(since, asset.version)
+    if diff is None:
+        # Unknown or compacted version: the client has to start over from a snapshot
+        return JSONResponse(content={
+            "version": asset.version,
+            "since": since,
+            "snapshot": True,
+            "features": asset.features,
+        })
+
+    by_id = await asset.derived("features_by_id", _build_features_by_id)
+    return JSONResponse(content={
+        "version": asset.version,
+        "since": since,
+        "snapshot": False,
+        "added": [by_id[key] for key in sorted(diff["added"])],
+        "updated": [by_id[key] for key in sorted(diff["updated"])],
+        "removed": sorted(diff["removed"]),
+    })
+
+
+@router.get("/map/{filename}/clusters")
+async def get_map_clusters(
+    filename: str,
+    zoom: int = Query(..., ge=0, le=24, description="Map zoom level"),
+    bbox: Optional[str] = Query(None, description="Viewport as minLng,minLat,maxLng,maxLat"),
+    limit: Optional[int] = Query(None, ge=1, description="Max clusters/points returned"),
+):
+    try:
+        viewport = parse_bbox(bbox) if bbox is not None else (-180.0, -90.0, 180.0, 90.0)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {str(e)}")
+
+    # The cluster hierarchy is built once per data version, off the event loop
+    asset = await map_cache.get(filename)
+    index = await asset.derived("clusters", build_cluster_index)
+    return JSONResponse(content={
+        "type": "FeatureCollection",
+        "zoom": min(zoom, CLUSTER_MAX_ZOOM + 1),
+        "features": index.get_clusters(viewport, zoom, limit),
+    })
+
+
+@router.get("/map/tiles/{z}/{x}/{y}")
+async def get_map_tile(z: int, x: int, y: str, request: Request):
+    # Accept both {y} and {y}.mvt / {y}.pbf style tile URLs
+    try:
+        tile_y = int(y.split(".", 1)[0])
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Tile not found.")
+
+    tile, last_modified = await tile_cache.get(z, x, tile_y)
+    if not tile.body:
+        # Mapbox GL treats 204 as an empty tile
+        return Response(status_code=204)
+    return encoded_response(request, tile, last_modified, media_type=TILE_MEDIA_TYPE)
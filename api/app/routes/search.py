@@ -1,50 +1,249 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Request
 from fastapi.responses import JSONResponse
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime, timezone
 from pathlib import Path
+import asyncio
 import json
+import os
+import time
+from app.models.search import BatchSearchRequest, OpenStatusRequest
+from app.services import columnar
+from app.services.business_hours import HoursEngine, load_business_hours, parse_instant, to_epoch_minute
+from app.services.field_projection import ProjectionCache, parse_fields
+from app.services.map_collections import collections_stamp, merge_collections
+from app.services.product_index import ProductIndex
+from app.services.map_cache import encode_json
+from app.services.query_cache import QueryCache
+from app.services.search_index import SearchIndex
+from app.services.spatial_index import parse_latlng
+from app.services.store_details import iter_store_details
+from app.services.text_index import FullTextIndex, detail_fields
+from app.services.text_normalize import normalize
+from app.utils.cursor import decode_cursor, digest, encode_cursor
+from app.utils.http_cache import EncodedBody, encoded_response
 
 router = APIRouter()
 
-# Cache for meta data to improve performance
-_meta_cache: Optional[Dict[str, Any]] = None
+META_PATH = Path(__file__).resolve().parent.parent.parent / "assets" / "map" / "meta.json"
 
-# ─── Load stores meta data ──────────────────────
-async def load_meta_data() -> Dict[str, Any]:
+# Requests within this many seconds share one stat of the collection files
+STAMP_CHECK_S = 1.0
 
-    global _meta_cache
-    
-    if _meta_cache is None:
-        # Navigate to assets/map directory
-        base_path = Path(__file__).resolve().parent.parent.parent / "assets" / "map"
-        meta_path = base_path / "meta.json"
-        
-        if not meta_path.exists():
-            raise HTTPException(
-                status_code=500, 
-                detail="Search data file not found"
-            )
-        
+# Formatted search payloads, keyed by normalized parameters and tied to the snapshot version
+_query_cache = QueryCache()
+
+# Fields of a search result, in response order
+RESULT_FIELDS = ("id", "title", "type", "longitude", "latitude", "tags", "auid", "placeid", "layout", "producttag")
+# Shorthand accepted in fields=
+FIELD_ALIASES = {"coordinates": ("longitude", "latitude")}
+
+# ─── Search snapshot ────────────────────────────
+class SearchSnapshot:
+    """meta.json, the other map collections and every structure derived from them,
+    built once and never modified
+
+    Requests take one snapshot and use it throughout, so a reload that swaps in
+    a new one never shows them a half-built index.
+    """
+
+    def __init__(self, meta_data: Dict[str, Any], stamp: Tuple[int, int], version: int):
+        self.meta_data = meta_data
+        features = meta_data.get("features", []) if isinstance(meta_data, dict) else []
+        # meta.json stores, then stores only other map files list; shared ones appear once
+        self.features, self.collections = merge_collections(features if isinstance(features, list) else [], META_PATH.parent)
+        # collections_stamp() of the map files this was read from
+        self.stamp = stamp
+        # Newest map file mtime, used as Last-Modified
+        self.last_modified = stamp[0] / 1_000_000_000
+        # Bumped on every build, so cached searches of older data are never served
+        self.version = version
+        # details.json per store, read by a thread pool; each one's text is indexed as it arrives
+        self.details: List[Optional[Dict[str, Any]]] = [None] * len(self.features)
+        text = FullTextIndex()
+        for ordinal, details in iter_store_details(self.features):
+            self.details[ordinal] = details
+            text.add(ordinal, detail_fields(details))
+        # Text, full-text, facet, filter and geo index over the features
+        self.index = SearchIndex(self.features, text.finish(), self.collections)
+        # Business hours compiled to UTC weekly tables
+        self.hours = HoursEngine(self.features, load_business_hours(self.features, self.details))
+        # Menu items with parsed prices, for product= and price range filters
+        self.products = ProductIndex(self.features, self.details)
+        # Pre-encoded /types, /tags and /facets payloads with their ETags
+        self.listings = _build_listings(self.index)
+        # Formatted result rows for every feature, one list per projection, built on first use
+        self.rows = ProjectionCache()
+        self.build_ms = 0.0
+
+
+# Snapshot being served; replaced whole, never mutated
+_snapshot: Optional[SearchSnapshot] = None
+_snapshot_version = 0
+# One rebuild at a time; requests keep the current snapshot meanwhile
+_reload_lock = asyncio.Lock()
+_reload_task: Optional[asyncio.Task] = None
+# Map files stamp whose build failed, so it isn't retried on every request
+_failed_stamp: Optional[Tuple[int, int]] = None
+# (monotonic time, stamp) of the last look at the collection files
+_checked_stamp: Optional[Tuple[float, Tuple[int, int]]] = None
+
+
+def _meta_stamp(fresh: bool = False) -> Tuple[int, int]:
+    """Stamp of the collection files, stat'ed at most once per STAMP_CHECK_S unless fresh"""
+    global _checked_stamp
+
+    now = time.monotonic()
+    if not fresh and _checked_stamp is not None and now - _checked_stamp[0] < STAMP_CHECK_S:
+        return _checked_stamp[1]
+    if not META_PATH.is_file():
+        raise HTTPException(
+            status_code=500,
+            detail="Search data file not found"
+        )
+    # Any collection file changing rebuilds the snapshot, not just meta.json
+    stamp = collections_stamp(META_PATH.parent)
+    _checked_stamp = (now, stamp)
+    return stamp
+
+
+def _build_snapshot(stamp: Tuple[int, int], version: int) -> SearchSnapshot:
+    """Read meta.json and the other map files and build every index (runs in a worker thread)"""
+    start = time.perf_counter()
+    with open(META_PATH, "r", encoding="utf-8") as f:
+        meta_data = json.load(f)
+    snapshot = SearchSnapshot(meta_data, stamp, version)
+    snapshot.build_ms = (time.perf_counter() - start) * 1000
+    return snapshot
+
+
+async def reload_search_snapshot(force: bool = False) -> SearchSnapshot:
+    """Rebuild the snapshot off the event loop if a map file changed (always with force), then swap it in"""
+    global _snapshot, _snapshot_version, _failed_stamp
+
+    async with _reload_lock:
+        stamp = _meta_stamp(fresh=True)
+        current = _snapshot
+        if not force and current is not None and current.stamp == stamp:
+            return current
+
+        _snapshot_version += 1
         try:
-            with open(meta_path, "r", encoding="utf-8") as f:
-                _meta_cache = json.load(f)
+            snapshot = await asyncio.to_thread(_build_snapshot, stamp, _snapshot_version)
         except json.JSONDecodeError:
+            _failed_stamp = stamp
             raise HTTPException(
                 status_code=500,
                 detail="Invalid search data format"
             )
         except Exception as e:
+            _failed_stamp = stamp
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to load search data: {str(e)}"
             )
-    
-    return _meta_cache
+
+        # A single reference assignment: requests see the old snapshot or the new one
+        _snapshot = snapshot
+        _failed_stamp = None
+        print(f"[search] Loaded map data v{snapshot.version} ({len(snapshot.features)} stores, "
+              f"{len(snapshot.collections)} collections) in {snapshot.build_ms:.0f} ms")
+        return snapshot
+
+
+async def _reload_in_background():
+    try:
+        await reload_search_snapshot()
+    except HTTPException as e:
+        print(f"[search] Reload failed, still serving the previous data: {e.detail}")
+
+
+def schedule_search_reload() -> None:
+    """Pick up a map file just written, e.g. an editor save, without holding up the caller"""
+    global _reload_task
+
+    # Queued behind any running rebuild; a no-op if the file isn't one search reads
+    _reload_task = asyncio.create_task(_reload_in_background())
+
+
+async def get_search_snapshot() -> SearchSnapshot:
+    """Current snapshot; when a map file changed, a rebuild starts and this request gets the current one"""
+    global _reload_task
+
+    snapshot = _snapshot
+    if snapshot is None:
+        return await reload_search_snapshot()
+
+    stamp = _meta_stamp()
+    if stamp != snapshot.stamp and stamp != _failed_stamp and (_reload_task is None or _reload_task.done()):
+        _reload_task = asyncio.create_task(_reload_in_background())
+    return snapshot
+
+
+def _build_listings(index: SearchIndex) -> Dict[str, EncodedBody]:
+    """Encode the /types, /tags and /facets responses once per data load."""
+    sorted_types = sorted(index.facet_dictionaries["type"])
+    sorted_tags = sorted(index.facet_dictionaries["storetag"])
+
+    listings = {
+        "types": {"types": sorted_types, "count": len(sorted_types)},
+        "tags": {"tags": sorted_tags, "count": len(sorted_tags)},
+        "facets": {"facets": index.facet_dictionaries, "total": index.size},
+    }
+    return {name: EncodedBody(encode_json(payload)) for name, payload in listings.items()}
+
+
+# ─── Result rows ────────────────────────────────
+def format_result(feature: Dict) -> Dict[str, Any]:
+    return {
+        "id": feature["properties"]["id"],
+        "title": feature["properties"]["title"],
+        "type": feature["properties"]["type"],
+        "longitude": feature["geometry"]["coordinates"][0],  # Keep as string
+        "latitude": feature["geometry"]["coordinates"][1],   # Keep as string
+        "tags": feature["properties"].get("storetag", []),
+        "auid": feature["properties"].get("auid"),
+        "placeid": feature["properties"].get("placeid"),
+        "layout": feature["properties"].get("layout"),
+        "producttag": feature["properties"].get("producttag", [])
+    }
+
+
+def resolve_fields(fields: Optional[str]) -> Optional[tuple]:
+    """Validate fields= against RESULT_FIELDS, returned in response order"""
+    requested = parse_fields(fields)
+    if requested is None:
+        return None
+    selected = set()
+    for field in requested:
+        expanded = FIELD_ALIASES.get(field, (field,))
+        unknown = [name for name in expanded if name not in RESULT_FIELDS]
+        if unknown:
+            raise ValueError(f"unknown field '{field}'")
+        selected.update(expanded)
+    return tuple(name for name in RESULT_FIELDS if name in selected)
+
+
+def _result_rows(snapshot: SearchSnapshot, projection: Optional[tuple]) -> List[Dict[str, Any]]:
+    """Rows for every feature under a projection, built once per snapshot"""
+    def build():
+        rows = [format_result(feature) for feature in snapshot.features]
+        if projection is None:
+            return rows
+        return [{name: row[name] for name in projection} for row in rows]
+    return snapshot.rows.get_or_build(projection, build)
+
+
+def _rounded(distance: Optional[float]) -> Optional[float]:
+    """Meters to one decimal, None for stores without a point"""
+    return round(distance, 1) if distance is not None else None
+
 
 # ─── Relevance algorithm ────────────────────────
+# Reference scorer; SearchIndex produces the same tiers without scanning every feature
 def calculate_relevance_score(query: str, title: str, store_type: str) -> float:
-    query_lower = query.lower()
-    title_lower = title.lower()
+    query_lower = normalize(query)
+    title_lower = normalize(title)
     type_lower = store_type.lower()
     
     # Title > Type > Tag
@@ -68,45 +267,63 @@ def calculate_relevance_score(query: str, title: str, store_type: str) -> float:
     return 0.0
 
 
-def filter_by_type(features: List[Dict], store_type: str) -> List[Dict]:
-    """Filter features by store type."""
-    type_lower = store_type.lower()
-    return [
-        feature for feature in features
-        if feature.get("properties", {}).get("type", "").lower() == type_lower
-    ]
-
-
-def filter_by_tags(features: List[Dict], tags: List[str]) -> List[Dict]:
-    """Filter features by store tags (OR operation - any tag matches)."""
-    if not tags:
-        return features
-    
-    tags_lower = [tag.lower() for tag in tags]
-    filtered = []
-    
-    for feature in features:
-        store_tags = feature.get("properties", {}).get("storetag", [])
-        store_tags_lower = [tag.lower() for tag in store_tags]
-        
-        # Check if any requested tag is in store tags
-        if any(tag in store_tags_lower for tag in tags_lower):
-            filtered.append(feature)
-    
-    return filtered
-
-
 @router.get("")
 async def search_stores(
     q: Optional[str] = Query(None),
     type: Optional[str] = Query(None),
     tags: Optional[List[str]] = Query(None),
-    limit: Optional[int] = Query(50)
+    limit: Optional[int] = Query(50, ge=0),
+    format: str = Query("json", pattern="^(json|columnar)$"),
+    fields: Optional[str] = Query(None),
+    fuzzy: bool = Query(False),
+    facets: bool = Query(True),
+    tags_mode: str = Query("any", pattern="^(any|all)$"),
+    exclude_tags: Optional[List[str]] = Query(None),
+    producttags: Optional[List[str]] = Query(None),
+    near: Optional[str] = Query(None),
+    radius_m: Optional[float] = Query(None, gt=0),
+    sort: str = Query("relevance", pattern="^(relevance|distance)$"),
+    open_now: bool = Query(False),
+    open_at: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    collection: Optional[List[str]] = Query(None),
+    product: Optional[str] = Query(None),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    currency: Optional[str] = Query(None, pattern="^[A-Za-z]{3}$")
 ) -> Dict[str, Any]:
-    
-    # Load search data
+    snapshot = await _loaded_snapshot()
+    return _run_search(snapshot, datetime.now(timezone.utc), q, type, tags, limit, format, fields, fuzzy,
+                       facets, tags_mode, exclude_tags, producttags, near, radius_m, sort, open_now,
+                       open_at, cursor, collection, product, min_price, max_price, currency)
+
+
+@router.post("/batch")
+async def search_batch(body: BatchSearchRequest) -> Dict[str, Any]:
+    """
+    Run several searches in one request, e.g. one per category chip on the home screen.
+    Every search sees the same data and clock, and identical filters are evaluated
+    once. Each block is what GET /api/search returns, or an error for that search alone.
+    """
+    snapshot = await _loaded_snapshot()
+    now = datetime.now(timezone.utc)
+    masks: Dict[tuple, Optional[int]] = {}
+    blocks = []
+    for spec in body.searches:
+        try:
+            blocks.append(_run_search(snapshot, now, **spec.model_dump(), masks=masks))
+        except HTTPException as e:
+            blocks.append({"error": e.detail, "status_code": e.status_code})
+    return {
+        "results": blocks,
+        "count": len(blocks)
+    }
+
+
+async def _loaded_snapshot() -> SearchSnapshot:
+    """Current snapshot; it serves the whole request even if a reload swaps it"""
     try:
-        meta_data = await load_meta_data()
+        snapshot = await get_search_snapshot()
     except HTTPException:
         raise
     except Exception as e:
@@ -116,153 +333,280 @@ async def search_stores(
         )
     
     # Validate data structure
-    if not meta_data or "features" not in meta_data:
+    if not snapshot.meta_data or "features" not in snapshot.meta_data:
         raise HTTPException(
             status_code=500,
             detail="Invalid search data structure"
         )
-    
-    features = meta_data["features"]
-    results = []
-    
-    # Step 1: Text search (if query provided)
-    if q:
-        query_lower = q.lower().strip()
-        
-        for feature in features:
-            properties = feature.get("properties", {})
-            title = properties.get("title", "")
-            
-            # Calculate relevance score
-            store_type = properties.get("type", "")
-            score = calculate_relevance_score(q, title, store_type)
-            
-            if score > 0:
-                results.append((score, feature))
-        
-        # Sort by relevance score (highest first)
-        results.sort(key=lambda x: x[0], reverse=True)
-        results = [feature for _, feature in results]
-    else:
-        # No query - start with all features
-        results = features.copy()
-    
-    # Step 2: Apply type filter
-    if type:
-        results = filter_by_type(results, type)
-    
-    # Step 3: Apply tag filters
-    if tags:
-        results = filter_by_tags(results, tags)
-    
-    # Step 4: Apply limit
-    results = results[:limit]
-    
-    formatted_results = []
-    for feature in results:
-        formatted_results.append({
-            "id": feature["properties"]["id"],
-            "title": feature["properties"]["title"],
-            "type": feature["properties"]["type"],
-            "longitude": feature["geometry"]["coordinates"][0],  # Keep as string
-            "latitude": feature["geometry"]["coordinates"][1],   # Keep as string
-            "tags": feature["properties"].get("storetag", []),
-            "auid": feature["properties"].get("auid"),
-            "placeid": feature["properties"].get("placeid"),
-            "layout": feature["properties"].get("layout"),
-            "producttag": feature["properties"].get("producttag", [])
-        })
+    return snapshot
+
+
+def _run_search(snapshot: SearchSnapshot, now: datetime, q, type, tags, limit, format, fields, fuzzy,
+                facets, tags_mode, exclude_tags, producttags, near, radius_m, sort, open_now, open_at,
+                cursor, collection, product, min_price, max_price, currency,
+                masks: Optional[Dict[tuple, Optional[int]]] = None) -> Dict[str, Any]:
+    """Response of one search on a loaded snapshot; HTTPException for bad parameters"""
+    try:
+        projection = resolve_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid fields: {str(e)}")
+
+    try:
+        origin = parse_latlng(near) if near is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid near: {str(e)}")
+    if origin is None and (radius_m is not None or sort == "distance"):
+        raise HTTPException(status_code=400, detail="radius_m and sort=distance require near=lat,lng")
+
+    try:
+        open_time = parse_instant(open_at) if open_at is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid open_at: {str(e)}")
+    if open_time is None and open_now:
+        open_time = now
+
+    if (min_price is not None or max_price is not None) and not currency:
+        raise HTTPException(status_code=400, detail="min_price and max_price require currency")
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=400, detail="min_price must not exceed max_price")
+    # (product words, currency, min, max), or None when no product condition is given
+    products = None
+    if (product and product.strip()) or currency:
+        products = (normalize(product.strip()) if product and product.strip() else None,
+                    currency.upper() if currency else None, min_price, max_price)
+
+    features = snapshot.features
+
+    # A cursor only resumes the search it was issued for, on the same data
+    scope = _cursor_scope(q, type, tags, fuzzy, tags_mode, exclude_tags, producttags,
+                          origin, radius_m, sort, open_time, collection, products)
+    after = None
+    if cursor is not None:
+        if limit is None or limit <= 0:
+            raise HTTPException(status_code=400, detail="Invalid cursor: paging requires a positive limit")
+        after = _cursor_key(cursor, snapshot.version, scope, q, origin, sort)
+
+    # Repeated searches reuse the formatted payload of this data version
+    key = _query_key(q, type, tags, limit, format, projection, fuzzy, facets, tags_mode,
+                     exclude_tags, producttags, origin, radius_m, sort, open_time) + (_sorted_values(collection), products, after)
+    payload = _query_cache.get(key, snapshot.version)
+    if payload is None:
+        payload = _search_payload(snapshot, q, type, tags, limit, format, projection, fuzzy, facets,
+                                  tags_mode, exclude_tags, producttags, origin, radius_m, sort, open_time,
+                                  after, scope, masks, collection, products)
+        _query_cache.put(key, snapshot.version, payload)
 
     return {
-        "results": formatted_results,
-        "count": len(formatted_results),
+        "results": payload["results"],
+        "count": payload["count"],
         "total": len(features),
         "query": q,
         "filters": {
             "type": type,
             "tags": tags,
+            "tags_mode": tags_mode,
+            "exclude_tags": exclude_tags,
+            "producttags": producttags,
+            "near": near,
+            "radius_m": radius_m,
+            "open_now": open_now,
+            "open_at": open_time.isoformat() if open_time is not None else None,
+            "collection": collection,
+            "product": product,
+            "currency": currency.upper() if currency else None,
+            "min_price": min_price,
+            "max_price": max_price,
             "limit": limit
-        }
+        },
+        "sort": sort,
+        "facets": payload["facets"],
+        "next_cursor": payload["next_cursor"]
+    }
+
+
+def _sorted_values(values: Optional[List[str]]) -> tuple:
+    # Filters match case-insensitively and ignore order and repeats
+    return tuple(sorted({value.lower() for value in values})) if values else ()
+
+
+def _query_key(q, type, tags, limit, format, projection, fuzzy, facets, tags_mode,
+               exclude_tags, producttags, origin, radius_m, sort, open_time) -> tuple:
+    """Normalized search parameters: requests that differ only in case or tag order share an entry"""
+    return (
+        normalize(q) if q else None,
+        type.lower() if type else None,
+        _sorted_values(tags),
+        limit,
+        format,
+        projection,
+        fuzzy,
+        facets,
+        tags_mode,
+        _sorted_values(exclude_tags),
+        _sorted_values(producttags),
+        origin,
+        radius_m,
+        sort,
+        # Open status changes by the minute, like the open-store bitset
+        to_epoch_minute(open_time) if open_time is not None else None,
+    )
+
+
+def _cursor_scope(q, type, tags, fuzzy, tags_mode, exclude_tags, producttags,
+                  origin, radius_m, sort, open_time, collection, products) -> str:
+    """Digest of the parameters that decide which stores match and in what order
+
+    Page size, format and fields may change between pages; the open-hours
+    instant only counts as set or not, so paging open stores survives the minute.
+    """
+    return digest((
+        normalize(q) if q else None,
+        type.lower() if type else None,
+        _sorted_values(tags),
+        fuzzy,
+        tags_mode,
+        _sorted_values(exclude_tags),
+        _sorted_values(producttags),
+        origin,
+        radius_m,
+        sort,
+        open_time is not None,
+        _sorted_values(collection),
+        products,
+    ))
+
+
+def _cursor_key(cursor: str, version: int, scope: str, q, origin, sort) -> tuple:
+    """Sort key a cursor resumes after; 400 if it does not belong to this search"""
+    try:
+        cursor_version, cursor_digest, key = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
+    if cursor_version != version:
+        raise HTTPException(status_code=400, detail="Invalid cursor: search data changed, start again")
+    if cursor_digest != scope:
+        raise HTTPException(status_code=400, detail="Invalid cursor: issued for a different search")
+    # Key shape as made by SearchIndex.ranked(): optional distance, score when ranking, ordinal
+    size = 1 + bool(q) + (origin is not None and sort == "distance")
+    if len(key) != size or not isinstance(key[-1], int):
+        raise HTTPException(status_code=400, detail="Invalid cursor: malformed cursor")
+    return key
+
+
+def _search_payload(snapshot: SearchSnapshot, q, type, tags, limit, format, projection, fuzzy, facets,
+                    tags_mode, exclude_tags, producttags, origin, radius_m, sort, open_time,
+                    after: Optional[tuple] = None, scope: Optional[str] = None,
+                    masks: Optional[Dict[tuple, Optional[int]]] = None,
+                    collection: Optional[List[str]] = None,
+                    products: Optional[tuple] = None) -> Dict[str, Any]:
+    """Results, count, facet counts and next-page cursor of one search
+
+    masks, when given, keeps filter bitsets by filter for other searches of a batch.
+    """
+    # Filters are bitset operations; ranking and limit come from the index, and
+    # facet counts cover every match, not just this page
+    index = snapshot.index
+    filters = (type.lower() if type else None, _sorted_values(tags), tags_mode, _sorted_values(exclude_tags),
+               _sorted_values(producttags), to_epoch_minute(open_time) if open_time is not None else None,
+               _sorted_values(collection), products)
+    # Products matching every product condition; their stores pass the filter
+    product_bits = snapshot.products.match(*products) if products is not None else None
+    if masks is not None and filters in masks:
+        mask = masks[filters]
+    else:
+        mask = index.filter_mask(type, tags, tags_mode, exclude_tags, producttags, collection)
+        if open_time is not None:
+            # Stores with unknown hours are left out
+            open_mask = snapshot.hours.open_mask(open_time)
+            mask = open_mask if mask is None else mask & open_mask
+        if product_bits is not None:
+            stores = snapshot.products.store_mask(product_bits)
+            mask = stores if mask is None else mask & stores
+        if masks is not None:
+            masks[filters] = mask
+    facet_counts = index.facet_counts() if facets else None
+    # One extra result tells whether another page follows
+    fetch = limit + 1 if limit is not None and limit > 0 else limit
+    page = index.ranked(q, mask, fetch, fuzzy=fuzzy, facets=facet_counts,
+                        near=origin, radius_m=radius_m, sort=sort, after=after)
+    next_cursor = None
+    if limit is not None and limit > 0 and len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(snapshot.version, scope, page[-1][0])
+    ordinals = [ordinal for _, ordinal in page]
+
+    # Rows are precomputed per projection, so results are only looked up here
+    rows = _result_rows(snapshot, projection)
+    formatted_results = [rows[ordinal] for ordinal in ordinals]
+    if origin is not None:
+        # Distance is per request, so it goes on a copy of the shared row
+        formatted_results = [
+            {**row, "distance": _rounded(index.distance(ordinal, *origin))}
+            for row, ordinal in zip(formatted_results, ordinals)
+        ]
+    if product_bits is not None:
+        # Each store lists the products that matched, with their parsed prices
+        formatted_results = [
+            {**row, "products": snapshot.products.store_products(ordinal, product_bits)}
+            for row, ordinal in zip(formatted_results, ordinals)
+        ]
+
+    count = len(formatted_results)
+    if format == columnar.FORMAT_NAME:
+        formatted_results = columnar.encode_rows(formatted_results)
+
+    return {
+        "results": formatted_results,
+        "count": count,
+        "facets": facet_counts.as_dict() if facet_counts is not None else None,
+        "next_cursor": next_cursor
     }
 
 
 @router.get("/types")
-async def get_store_types() -> Dict[str, Any]:
+async def get_store_types(request: Request):
     """
     Get all available store types for filtering.
     Useful for populating filter dropdowns in the UI.
     """
-    meta_data = await load_meta_data()
-    features = meta_data.get("features", [])
-    
-    # Collect unique types
-    types = set()
-    for feature in features:
-        store_type = feature.get("properties", {}).get("type")
-        if store_type:
-            types.add(store_type)
-    
-    # Sort and structure response
-    sorted_types = sorted(types)
-    
-    return {
-        "types": sorted_types,
-        "count": len(sorted_types)
-    }
+    snapshot = await get_search_snapshot()
+    return encoded_response(request, snapshot.listings["types"], snapshot.last_modified)
 
 
 @router.get("/tags")
-async def get_store_tags() -> Dict[str, Any]:
+async def get_store_tags(request: Request):
     """
     Get all available store tags for filtering.
     Useful for populating filter options in the UI.
     """
-    meta_data = await load_meta_data()
-    features = meta_data.get("features", [])
-    
-    # Collect unique tags
-    tags = set()
-    for feature in features:
-        store_tags = feature.get("properties", {}).get("storetag", [])
-        for tag in store_tags:
-            if tag:
-                tags.add(tag)
-    
-    # Sort and structure response
-    sorted_tags = sorted(tags)
-    
-    return {
-        "tags": sorted_tags,
-        "count": len(sorted_tags)
-    }
+    snapshot = await get_search_snapshot()
+    return encoded_response(request, snapshot.listings["tags"], snapshot.last_modified)
+
+
+@router.get("/facets")
+async def get_store_facets(request: Request):
+    """
+    Get every facet value (type, storetag, producttag, layout, country)
+    with its store count, most common first.
+    """
+    snapshot = await get_search_snapshot()
+    return encoded_response(request, snapshot.listings["facets"], snapshot.last_modified)
 
 
 @router.get("/suggestions")
 async def get_search_suggestions(
-    q: str = Query(..., description="Partial query for suggestions", min_length=1)
+    q: str = Query(..., description="Partial query for suggestions", min_length=1),
+    fuzzy: bool = Query(False, description="Also suggest titles with typos in the query")
 ) -> Dict[str, Any]:
     """
     Get search suggestions based on partial input.
     Returns up to 10 matching store names for autocomplete.
     """
-    meta_data = await load_meta_data()
-    features = meta_data.get("features", [])
-    
-    query_lower = q.lower().strip()
-    suggestions = []
-    
-    for feature in features:
-        title = feature.get("properties", {}).get("title", "")
-        title_lower = title.lower()
-        
-        # Check if title contains or starts with query
-        if query_lower in title_lower:
-            score = 2.0 if title_lower.startswith(query_lower) else 1.0
-            suggestions.append((score, title))
-    
-    # Sort by relevance and limit to 10
-    suggestions.sort(key=lambda x: x[0], reverse=True)
-    suggestions = [title for _, title in suggestions][:10]
+    index = (await get_search_snapshot()).index
+
+    # Prefix matches first, then infix matches by position; ties by title, then feature order
+    ordinals = index.suggest(q.strip(), fuzzy=fuzzy)
+    suggestions = [index.display_titles[ordinal] for ordinal in ordinals]
     
     return {
         "suggestions": suggestions,
@@ -271,9 +615,45 @@ async def get_search_suggestions(
     }
 
 
+@router.post("/open-status")
+async def get_open_status(body: OpenStatusRequest) -> Dict[str, Any]:
+    """
+    Get open/closed status for many stores at once, now or at a given time.
+    Status is null for unknown ids and stores without business hours.
+    """
+    try:
+        at = parse_instant(body.at) if body.at is not None else datetime.now(timezone.utc)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid at: {str(e)}")
+
+    snapshot = await get_search_snapshot()
+    statuses = snapshot.hours.status(body.ids, at)
+
+    return {
+        "status": statuses,
+        "open": sum(1 for is_open in statuses.values() if is_open),
+        "count": len(statuses),
+        "at": at.isoformat()
+    }
+
+
+@router.get("/cache")
+async def get_search_cache_stats() -> Dict[str, Any]:
+    """
+    Get query-result cache counters: entries, hits, misses, evictions,
+    expirations and data-version invalidations.
+    """
+    return _query_cache.stats()
+
+
 # Optional: Clear cache function (useful for development)
 async def clear_search_cache():
-    """Clear the cached meta data. Useful when data is updated."""
-    global _meta_cache
-    _meta_cache = None
-    return {"message": "Search cache cleared"}
\ No newline at end of file
+    """Rebuild the search snapshot from the map files and drop cached searches."""
+    snapshot = await reload_search_snapshot(force=True)
+    _query_cache.clear()
+    return {
+        "message": "Search cache cleared",
+        "version": snapshot.version,
+        "stores": len(snapshot.features),
+        "build_ms": round(snapshot.build_ms, 1)
+    }
@@ -0,0 +1,284 @@
+import re
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from app.services.store_details import load_store_details
+from app.utils import bitset
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+# 1970-01-01 was a Thursday; minute-of-week counts from Monday 00:00
+_EPOCH_WEEK_MINUTE = 3 * DAY_MINUTES
+
+# UTC offset transitions are precomputed for this window around the data load;
+# lookups outside it fall back to zoneinfo
+TRANSITION_WINDOW = (timedelta(days=-400), timedelta(days=800))
+
+# open_at= instants must leave room for local offsets and holiday lookups (up to
+# two days back) without leaving the range datetime can represent
+_EARLIEST = datetime.min.replace(tzinfo=timezone.utc) + timedelta(days=3)
+_LATEST = datetime.max.replace(tzinfo=timezone.utc) - timedelta(days=3)
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def parse_clock(value: Any) -> int:
+    """Minutes after midnight for "HH:MM" or "HHMM" """
+    digits = _NON_DIGITS.sub("", str(value)).zfill(4)
+    if len(digits) != 4:
+        raise ValueError(f"bad time '{value}'")
+    hours, minutes = int(digits[:2]), int(digits[2:])
+    if hours > 24 or minutes > 59 or hours * 60 + minutes > DAY_MINUTES:
+        raise ValueError(f"bad time '{value}'")
+    return hours * 60 + minutes
+
+
+def week_minute(epoch_minute: int) -> int:
+    return (epoch_minute + _EPOCH_WEEK_MINUTE) % WEEK_MINUTES
+
+
+def to_epoch_minute(at: datetime) -> int:
+    """Whole UTC minutes since the epoch; naive datetimes are taken as UTC"""
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return int(at.timestamp() // 60)
+
+
+def parse_instant(value: str) -> datetime:
+    """ISO 8601 timestamp for open_at=; without an offset it is UTC"""
+    try:
+        at = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"expected an ISO 8601 time, got '{value}'")
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    try:
+        in_range = _EARLIEST <= at.astimezone(timezone.utc) <= _LATEST
+    except OverflowError:
+        in_range = False
+    if not in_range:
+        raise ValueError(f"'{value}' is outside the supported range")
+    return at
+
+
+def load_business_hours(features: List[Dict], details: Optional[List[Optional[Dict]]] = None) -> List[Optional[Dict]]:
+    """businesshour block per feature, None when the store has no readable details"""
+    if details is None:
+        details = load_store_details(features)
+    blocks = [store_details.get("businesshour") if store_details else None for store_details in details]
+    return [block if isinstance(block, dict) else None for block in blocks]
+
+
+# ─── Time zones ─────────────────────────────────
+class ZoneOffsets:
+    """UTC offset of one time zone by epoch minute, from precomputed transitions"""
+
+    def __init__(self, zone: ZoneInfo, start: datetime, end: datetime):
+        self.zone = zone
+        self.start = to_epoch_minute(start)
+        self.end = to_epoch_minute(end)
+        # Offset changes at most a few times a year: sample daily, then bisect each change to the minute
+        self.transitions: List[int] = [self.start]
+        self.offsets: List[int] = [self._offset(self.start)]
+        for day in range(self.start + DAY_MINUTES, self.end + DAY_MINUTES, DAY_MINUTES):
+            if self._offset(day) == self.offsets[-1]:
+                continue
+            low, high = day - DAY_MINUTES, day
+            while high - low > 1:
+                middle = (low + high) // 2
+                if self._offset(middle) == self.offsets[-1]:
+                    low = middle
+                else:
+                    high = middle
+            self.transitions.append(high)
+            self.offsets.append(self._offset(high))
+
+    def _offset(self, epoch_minute: int) -> int:
+        at = datetime.fromtimestamp(epoch_minute * 60, tz=timezone.utc)
+        return int(at.astimezone(self.zone).utcoffset().total_seconds() // 60)
+
+    def offset(self, epoch_minute: int) -> int:
+        """Offset in minutes at an epoch minute"""
+        if self.start <= epoch_minute <= self.end:
+            return self.offsets[bisect_right(self.transitions, epoch_minute) - 1]
+        return self._offset(epoch_minute)
+
+    def distinct(self) -> List[int]:
+        return sorted(set(self.offsets))
+
+
+# ─── Weekly tables ──────────────────────────────
+def local_intervals(block: Dict) -> List[Tuple[int, int, int]]:
+    """(day, start, end) in local minutes after that day's midnight; end may pass midnight"""
+    if block.get("24hr") is True:
+        return [(day, 0, DAY_MINUTES) for day in range(7)]
+    hours = block.get("hours")
+    if not isinstance(hours, dict):
+        return []
+    intervals = []
+    for day, name in enumerate(DAYS):
+        for interval in hours.get(name) or []:
+            try:
+                start, end = parse_clock(interval["start"]), parse_clock(interval["end"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if end <= start:
+                # Closing at or before opening means closing after midnight
+                end += DAY_MINUTES
+            intervals.append((day, start, end))
+    return intervals
+
+
+class WeeklyTable:
+    """Open intervals on the UTC minute-of-week circle, for one store at one UTC offset
+
+    Each interval remembers how long after its local opening a UTC minute falls,
+    so holiday checks can recover the local date it opened on.
+    """
+
+    __slots__ = ("starts", "ends", "reach", "opened")
+
+    def __init__(self, intervals: List[Tuple[int, int, int]], offset: int):
+        pieces = []
+        for day, start, end in intervals:
+            utc_start = (day * DAY_MINUTES + start - offset) % WEEK_MINUTES
+            length = end - start
+            # Split where the week wraps; the second piece opened `first` minutes earlier
+            first = min(length, WEEK_MINUTES - utc_start)
+            pieces.append((utc_start, utc_start + first, 0))
+            if first < length:
+                pieces.append((0, length - first, first))
+        pieces.sort()
+        self.starts = [start for start, _, _ in pieces]
+        self.ends = [end for _, end, _ in pieces]
+        # Minutes already open at each piece's start, to step back to the local opening
+        self.opened = [already for _, _, already in pieces]
+        # Running max of ends: overlapping intervals are found by walking back while it covers
+        self.reach = []
+        for end in self.ends:
+            self.reach.append(max(end, self.reach[-1]) if self.reach else end)
+
+    def covering(self, minute: int) -> Iterable[int]:
+        """Minutes since local opening for every interval covering a UTC minute-of-week"""
+        i = bisect_right(self.starts, minute) - 1
+        while i >= 0 and self.reach[i] > minute:
+            if self.ends[i] > minute:
+                yield minute - self.starts[i] + self.opened[i]
+            i -= 1
+
+
+class StoreHours:
+    """One store's hours: weekly tables per UTC offset of its zone, plus holidays"""
+
+    __slots__ = ("zone", "intervals", "tables", "holidays")
+
+    def __init__(self, zone: ZoneOffsets, intervals: List[Tuple[int, int, int]], holidays: frozenset):
+        self.zone = zone
+        self.intervals = intervals
+        self.tables = {offset: WeeklyTable(intervals, offset) for offset in zone.distinct()}
+        self.holidays = holidays
+
+    def is_open(self, epoch_minute: int) -> bool:
+        offset = self.zone.offset(epoch_minute)
+        table = self.tables.get(offset)
+        if table is None:
+            # Outside the precomputed window with an offset the window never saw
+            table = self.tables[offset] = WeeklyTable(self.intervals, offset)
+        for elapsed in table.covering(week_minute(epoch_minute)):
+            if not self.holidays:
+                return True
+            # Holidays close the intervals that open on them, not yesterday's late hours
+            opened = datetime.fromtimestamp((epoch_minute + offset - elapsed) * 60, tz=timezone.utc)
+            if opened.strftime("%m%d") not in self.holidays:
+                return True
+        return False
+
+
+def holiday_set(block: Dict) -> frozenset:
+    """Annual shop-local holidays as "MMDD" strings, as the frontend normalizes them"""
+    holidays = block.get("holiday")
+    if not isinstance(holidays, list):
+        return frozenset()
+    return frozenset(_NON_DIGITS.sub("", str(day)).zfill(4) for day in holidays)
+
+
+# ─── Engine ─────────────────────────────────────
+class HoursEngine:
+    """Open/closed status of every store, compiled once per data load"""
+
+    def __init__(self, features: List[Dict], blocks: Optional[List[Optional[Dict]]] = None, now: Optional[datetime] = None):
+        if blocks is None:
+            blocks = load_business_hours(features)
+        now = now or datetime.now(timezone.utc)
+        start, end = now + TRANSITION_WINDOW[0], now + TRANSITION_WINDOW[1]
+
+        self.size = len(features)
+        self.ids: Dict[str, int] = {}
+        for ordinal, feature in enumerate(features):
+            store_id = feature.get("properties", {}).get("id")
+            if isinstance(store_id, str):
+                self.ids.setdefault(store_id, ordinal)
+
+        zones: Dict[str, Optional[ZoneOffsets]] = {}
+        # Stores with the same zone, hours and holidays share one compiled schedule
+        schedules: Dict[tuple, int] = {}
+        self._schedules: List[StoreHours] = []
+        # Ordinals per schedule, so open_mask checks each schedule once
+        self._members: List[List[int]] = []
+        # None where the status is unknown: no details, or an unknown time zone
+        self.stores: List[Optional[StoreHours]] = []
+        for ordinal, block in enumerate(blocks):
+            name = block.get("timezone") if block else None
+            if isinstance(name, str) and name not in zones:
+                try:
+                    zones[name] = ZoneOffsets(ZoneInfo(name), start, end)
+                except (ValueError, KeyError, OSError) as e:
+                    print(f"[business_hours] Unknown timezone {name}: {e}")
+                    zones[name] = None
+            zone = zones.get(name) if isinstance(name, str) else None
+            if zone is None:
+                self.stores.append(None)
+                continue
+            intervals, holidays = local_intervals(block), holiday_set(block)
+            key = (name, tuple(intervals), holidays)
+            index = schedules.get(key)
+            if index is None:
+                index = schedules[key] = len(self._schedules)
+                self._schedules.append(StoreHours(zone, intervals, holidays))
+                self._members.append([])
+            self.stores.append(self._schedules[index])
+            self._members[index].append(ordinal)
+
+        # Open-store bitset for the last minute asked, shared by every request in that minute
+        self._mask: Tuple[Optional[int], int] = (None, 0)
+
+    def is_open(self, ordinal: int, at: datetime) -> Optional[bool]:
+        store = self.stores[ordinal]
+        return store.is_open(to_epoch_minute(at)) if store is not None else None
+
+    def open_mask(self, at: datetime) -> int:
+        """Bitset of stores open at a time; unknown hours count as not open"""
+        epoch_minute = to_epoch_minute(at)
+        cached_minute, mask = self._mask
+        if cached_minute == epoch_minute:
+            return mask
+        open_ordinals: List[int] = []
+        for store, members in zip(self._schedules, self._members):
+            if store.is_open(epoch_minute):
+                open_ordinals.extend(members)
+        mask = bitset.from_ordinals(open_ordinals)
+        self._mask = (epoch_minute, mask)
+        return mask
+
+    def status(self, ids: List[str], at: datetime) -> Dict[str, Optional[bool]]:
+        """store id -> open, None for unknown ids or hours"""
+        epoch_minute = to_epoch_minute(at)
+        statuses: Dict[str, Optional[bool]] = {}
+        for store_id in ids:
+            ordinal = self.ids.get(store_id)
+            store = self.stores[ordinal] if ordinal is not None else None
+            statuses[store_id] = store.is_open(epoch_minute) if store is not None else None
+        return statuses
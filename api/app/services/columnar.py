@@ -0,0 +1,117 @@
+"""
+Compact columnar encoding for store features and search results.
+
+Layout of an encoded table:
+    {
+      "format": "columnar", "version": 1, "count": N, "precision": 6,
+      "dictionary": ["cafe", "food", ...],
+      "encoding": {"title": "raw", "type": "dict", "storetag": "dict-list", "lng": "delta", ...},
+      "columns": {"title": [...], "type": [0, 0, 3], "storetag": [[0], []], "lng": [...], ...}
+    }
+
+- raw:       values as-is, None where a row has no value
+- dict:      index into "dictionary"
+- dict-list: list of indexes into "dictionary"
+- delta:     coordinates quantized to 10^-precision degrees, each value the
+             difference from the previous non-null one (first is absolute)
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.services.spatial_index import point_position
+
+FORMAT_NAME = "columnar"
+FORMAT_VERSION = 1
+
+# 6 decimals ≈ 0.11 m, far below what a map marker can show
+PRECISION = 6
+
+DICTIONARY_FIELDS = {"type", "layout"}
+DICTIONARY_LIST_FIELDS = {"storetag", "producttag", "tags"}
+COORDINATE_FIELDS = {"lng", "lat", "longitude", "latitude"}
+
+
+def _quantize(value: Any, scale: int) -> Optional[int]:
+    try:
+        return int(round(float(value) * scale))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def encode_rows(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Encode flat dict rows as a columnar table"""
+    names: List[str] = []
+    seen = set()
+    for row in rows:
+        for name in row:
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+
+    dictionary: List[str] = []
+    dictionary_index: Dict[str, int] = {}
+
+    def intern(value: Any) -> Any:
+        if not isinstance(value, str):
+            return value
+        index = dictionary_index.get(value)
+        if index is None:
+            index = len(dictionary)
+            dictionary_index[value] = index
+            dictionary.append(value)
+        return index
+
+    scale = 10 ** PRECISION
+    columns: Dict[str, List[Any]] = {}
+    encoding: Dict[str, str] = {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        if name in COORDINATE_FIELDS:
+            encoded = []
+            previous = 0
+            for value in values:
+                quantized = _quantize(value, scale)
+                if quantized is None:
+                    encoded.append(None)
+                else:
+                    encoded.append(quantized - previous)
+                    previous = quantized
+            columns[name], encoding[name] = encoded, "delta"
+        elif name in DICTIONARY_FIELDS:
+            columns[name], encoding[name] = [intern(value) for value in values], "dict"
+        elif name in DICTIONARY_LIST_FIELDS:
+            columns[name] = [[intern(tag) for tag in value] if isinstance(value, list) else value for value in values]
+            encoding[name] = "dict-list"
+        else:
+            columns[name], encoding[name] = values, "raw"
+
+    return {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "count": len(rows),
+        "precision": PRECISION,
+        "dictionary": dictionary,
+        "encoding": encoding,
+        "columns": columns,
+    }
+
+
+def encode_features(features: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Encode a FeatureCollection's features: Points become rows, anything else is kept verbatim"""
+    rows: List[Dict[str, Any]] = []
+    other: List[Dict[str, Any]] = []
+    for feature in features:
+        position = point_position(feature)
+        if position is None:
+            other.append(feature)
+            continue
+        row = dict(feature.get("properties") or {})
+        # Feature-level extras (e.g. "license") travel as their own columns
+        for key, value in feature.items():
+            if key not in ("type", "geometry", "properties"):
+                row[f"feature.{key}"] = value
+        row["lng"], row["lat"] = position
+        rows.append(row)
+
+    table = encode_rows(rows)
+    table["features"] = other
+    return table
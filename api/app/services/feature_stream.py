@@ -0,0 +1,110 @@
+import json
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+
+from app.services.map_cache import encode_json
+
+# Bytes read from disk per refill, and the target size of each streamed chunk
+READ_SIZE = 64 * 1024
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+class _Reader:
+    """Incremental JSON tokenizer over a text file with a sliding buffer"""
+
+    def __init__(self, f: TextIO):
+        self._file = f
+        self._decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int = READ_SIZE) -> bool:
+        if self.eof:
+            return False
+        data = self._file.read(size)
+        if not data:
+            self.eof = True
+            return False
+        # Drop what has been consumed so memory stays bounded by the largest value
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or '' at end of input"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} at offset {self.pos}, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value, reading more input as needed"""
+        self.peek()
+        read_size = READ_SIZE
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill(read_size):
+                    raise
+                # Grow reads so one huge value doesn't cost quadratic re-parsing
+                read_size *= 2
+                continue
+            # A number touching the end of the buffer may continue in the next read
+            if end == len(self.buffer) and not self.eof and self._fill(read_size):
+                continue
+            self.pos = end
+            return value
+
+
+def iter_features(path: Path) -> Iterator[Any]:
+    """Yield the elements of a FeatureCollection's "features" array one at a time"""
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _Reader(f)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.value()
+            reader.expect(":")
+            if key == "features":
+                reader.expect("[")
+                if reader.peek() == "]":
+                    return
+                while True:
+                    yield reader.value()
+                    if reader.expect(",]") == "]":
+                        # Nothing after the features array matters for the export
+                        return
+            reader.value()
+            if reader.expect(",}") == "}":
+                return
+
+
+def iter_ndjson(path: Path) -> Iterator[bytes]:
+    """Stream features as newline-delimited JSON, batched into ~CHUNK_SIZE chunks"""
+    chunk = []
+    size = 0
+    for feature in iter_features(path):
+        line = encode_json(feature) + b"\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield b"".join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield b"".join(chunk)
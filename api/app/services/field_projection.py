@@ -0,0 +1,36 @@
+from typing import Any, Dict, Optional, Tuple
+
+from app.utils.lru import LRUCache
+
+# Distinct projections kept per data version; anything beyond is built per request
+MAX_PROJECTIONS = 16
+
+
+def parse_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Normalize a comma-separated fields= value into a sorted, de-duplicated tuple"""
+    if value is None:
+        return None
+    fields = {field.strip() for field in value.split(",") if field.strip()}
+    if not fields:
+        raise ValueError("fields must name at least one field")
+    return tuple(sorted(fields))
+
+
+def project_feature(feature: Dict[str, Any], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """Keep only the requested properties; geometry is always kept so the feature stays valid GeoJSON"""
+    properties = feature.get("properties") or {}
+    projected = {key: value for key, value in feature.items() if key != "properties"}
+    projected["properties"] = {field: properties[field] for field in fields if field in properties}
+    return projected
+
+
+class ProjectionCache(LRUCache):
+    """Small LRU of projected payloads for one data version"""
+
+    def __init__(self, max_entries: int = MAX_PROJECTIONS):
+        super().__init__(max_entries)
+
+
+def build_projection_cache(_source: Any) -> ProjectionCache:
+    """Builder for MapAsset.derive()"""
+    return ProjectionCache()
@@ -0,0 +1,124 @@
+from typing import Dict, List, Optional
+
+from app.services.text_normalize import tokenize
+
+# Trigrams over padded words: "$$taco$" -> $$t, $ta, tac, aco, co$
+GRAM_SIZE = 3
+PAD = "$"
+
+
+def max_distance(word: str) -> int:
+    """Typos tolerated in a query word: none for short words, more for long ones"""
+    if len(word) < 4:
+        return 0
+    if len(word) < 8:
+        return 1
+    return 2
+
+
+def _padded_grams(word: str, prefix: bool) -> set:
+    # Prefix lookups leave the end open, so the closing pad is only added for whole words
+    padded = PAD * (GRAM_SIZE - 1) + word + ("" if prefix else PAD)
+    return {padded[i:i + GRAM_SIZE] for i in range(len(padded) - GRAM_SIZE + 1)}
+
+
+def edit_distance(query: str, word: str, limit: int, prefix: bool = False) -> Optional[int]:
+    """Edit distance (adjacent swaps count as one edit) if it is at most limit, else None
+
+    With prefix=True this is the distance from query to the closest prefix of word,
+    which is what autocomplete needs while the last word is still being typed.
+    """
+    if not prefix and abs(len(query) - len(word)) > limit:
+        return None
+    over = limit + 1
+    before: Optional[List[int]] = None
+    previous = list(range(len(word) + 1))
+    for i, char in enumerate(query, 1):
+        current = [i] + [over] * len(word)
+        # Only a diagonal band of width 2 * limit can stay within the limit
+        for j in range(max(1, i - limit), min(len(word), i + limit) + 1):
+            cost = 0 if word[j - 1] == char else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if before is not None and j > 1 and char == word[j - 2] and query[i - 2] == word[j - 1]:
+                value = min(value, before[j - 2] + 1)
+            current[j] = value
+        if min(current) > limit:
+            return None
+        before, previous = previous, current
+    distance = min(previous) if prefix else previous[-1]
+    return distance if distance <= limit else None
+
+
+class FuzzyIndex:
+    """Title words with a trigram index, for typo-tolerant matching without scanning every title"""
+
+    def __init__(self, titles: List[str]):
+        self.words: List[str] = []
+        # word id -> ordinals of titles containing it
+        self.postings: List[List[int]] = []
+        # trigram -> word ids, for candidate pruning
+        self.grams: Dict[str, List[int]] = {}
+
+        word_ids: Dict[str, int] = {}
+        for ordinal, title in enumerate(titles):
+            for word in set(tokenize(title)):
+                word_id = word_ids.get(word)
+                if word_id is None:
+                    word_id = word_ids[word] = len(self.words)
+                    self.words.append(word)
+                    self.postings.append([])
+                    for gram in _padded_grams(word, prefix=False):
+                        self.grams.setdefault(gram, []).append(word_id)
+                self.postings[word_id].append(ordinal)
+
+    def similar_words(self, query_word: str, prefix: bool = False) -> Dict[int, int]:
+        """word id -> edit distance for vocabulary words within the query word's typo budget"""
+        limit = max_distance(query_word)
+        query_grams = _padded_grams(query_word, prefix)
+        # Each edit breaks at most GRAM_SIZE + 1 grams (a swap touches two positions),
+        # so a match shares at least this many. Candidates come from the postings, so
+        # at least one shared gram is needed anyway (this only gives up a swap of the
+        # first two letters of a 4-letter, half-typed word)
+        required = max(1, len(query_grams) - (GRAM_SIZE + 1) * limit)
+
+        shared: Dict[int, int] = {}
+        for gram in query_grams:
+            for word_id in self.grams.get(gram, ()):
+                shared[word_id] = shared.get(word_id, 0) + 1
+
+        similar: Dict[int, int] = {}
+        for word_id, count in shared.items():
+            if count < required:
+                continue
+            distance = edit_distance(query_word, self.words[word_id], limit, prefix)
+            if distance is not None:
+                similar[word_id] = distance
+        return similar
+
+    def match(self, query: str, prefix: bool = False) -> Dict[int, int]:
+        """ordinal -> total edit distance for titles containing a close match of every query word
+
+        With prefix=True the last query word only has to be close to the start of a word.
+        """
+        query_words = tokenize(query)
+        if not query_words:
+            return {}
+
+        totals: Optional[Dict[int, int]] = None
+        for i, query_word in enumerate(query_words):
+            is_prefix = prefix and i == len(query_words) - 1
+            # Best distance per title for this query word
+            best: Dict[int, int] = {}
+            for word_id, distance in self.similar_words(query_word, is_prefix).items():
+                for ordinal in self.postings[word_id]:
+                    if totals is not None and ordinal not in totals:
+                        continue
+                    if distance < best.get(ordinal, distance + 1):
+                        best[ordinal] = distance
+            if totals is None:
+                totals = best
+            else:
+                totals = {ordinal: totals[ordinal] + distance for ordinal, distance in best.items()}
+            if not totals:
+                return {}
+        return totals
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from app.utils.http_cache import EncodedBody
+from app.services.spatial_index import FeatureIndex
+from app.services.map_changes import ChangeLog
+
+# Define MAP_PATH relative to this file
+MAP_PATH = Path(__file__).resolve().parent.parent.parent / "assets" / "map"
+
+
+def encode_json(data: Any) -> bytes:
+    """Encode data exactly like FastAPI's JSONResponse does"""
+    return json.dumps(
+        data,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class MapAsset:
+    """Parsed and pre-encoded snapshot of one map file at a given mtime"""
+
+    def __init__(self, filename: str, data: Dict[str, Any], encoded: EncodedBody, stamp: Tuple[int, int]):
+        self.filename = filename
+        self.data = data
+        # Encoded body, ETag and compressed variants, built once per load
+        self.encoded = encoded
+        # (mtime_ns, size) of the file this snapshot was read from
+        self.stamp = stamp
+        self.last_modified = stamp[0] / 1_000_000_000
+        # Monotonic data version, assigned by the file's ChangeLog
+        self.version = 0
+        # Spatial index for viewport queries, rebuilt with every load
+        self.spatial_index = FeatureIndex(self.features)
+        # Lazily built structures that live exactly as long as this data version
+        self._derived: Dict[str, Any] = {}
+        self._derived_lock = threading.Lock()
+
+    def derive(self, key: str, builder: Callable[["MapAsset"], Any]) -> Any:
+        """Build a structure from this asset once and memoize it (thread-safe)"""
+        value = self._derived.get(key)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = builder(self)
+                    self._derived[key] = value
+        return value
+
+    async def derived(self, key: str, builder: Callable[["MapAsset"], Any]) -> Any:
+        """Like derive(), but runs the first build in a worker thread"""
+        value = self._derived.get(key)
+        if value is None:
+            value = await asyncio.to_thread(self.derive, key, builder)
+        return value
+
+    @property
+    def features(self) -> List[Dict[str, Any]]:
+        features = self.data.get("features") if isinstance(self.data, dict) else None
+        return features if isinstance(features, list) else []
+
+    @property
+    def body(self) -> bytes:
+        return self.encoded.body
+
+    @property
+    def etag(self) -> str:
+        return self.encoded.etag
+
+
+class MapAssetCache:
+    """Keep map JSON files parsed and encoded in memory, invalidated by mtime"""
+
+    def __init__(self, base_path: Path = MAP_PATH):
+        self.base_path = base_path
+        self._assets: Dict[str, MapAsset] = {}
+        # filename -> (stamp, error detail) for files that failed to parse
+        self._failures: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # filename -> feature-level history across reloads
+        self._changes: Dict[str, ChangeLog] = {}
+
+    def resolve(self, filename: str) -> Path:
+        """Path of a map file, validating the name"""
+        # Ensure only .json files are allowed
+        if not filename.endswith(".json"):
+            raise HTTPException(status_code=400, detail="Only .json files are supported.")
+        return self.base_path / filename
+
+    def _stat(self, filename: str) -> Tuple[int, int]:
+        file_path = self.resolve(filename)
+        try:
+            stat = os.stat(file_path)
+        except (FileNotFoundError, NotADirectoryError):
+            raise HTTPException(status_code=404, detail="File not found.")
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _lookup(self, filename: str, stamp: Tuple[int, int]) -> Optional[MapAsset]:
+        asset = self._assets.get(filename)
+        if asset is not None and asset.stamp == stamp:
+            return asset
+
+        # Don't re-parse a broken file until it changes on disk
+        failure = self._failures.get(filename)
+        if failure is not None and failure[0] == stamp:
+            raise HTTPException(status_code=500, detail=failure[1])
+        return None
+
+    def _load(self, filename: str, stamp: Tuple[int, int]) -> MapAsset:
+        """Read, validate, encode and compress a map file (runs in a worker thread)"""
+        file_path = self.base_path / filename
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        asset = MapAsset(filename, data, EncodedBody(encode_json(data)), stamp)
+        asset.version = self.changes(filename).record(asset.features, asset.last_modified)
+        return asset
+
+    async def get(self, filename: str) -> MapAsset:
+        """Return the current snapshot of a map file, loading it if stale"""
+        stamp = self._stat(filename)
+        asset = self._lookup(filename, stamp)
+        if asset is not None:
+            return asset
+
+        # One lock per file so concurrent cold requests share a single load
+        lock = self._locks.setdefault(filename, asyncio.Lock())
+        async with lock:
+            stamp = self._stat(filename)
+            asset = self._lookup(filename, stamp)
+            if asset is not None:
+                return asset
+
+            try:
+                asset = await asyncio.to_thread(self._load, filename, stamp)
+            except FileNotFoundError:
+                raise HTTPException(status_code=404, detail="File not found.")
+            except ValueError:
+                self._failures[filename] = (stamp, "Invalid JSON file.")
+                raise HTTPException(status_code=500, detail="Invalid JSON file.")
+
+            self._assets[filename] = asset
+            self._failures.pop(filename, None)
+            sizes = ", ".join(f"{name} {len(body)}" for name, body in asset.encoded.variants.items())
+            print(f"[map_cache] Loaded {filename} ({len(asset.body)} bytes{', ' + sizes if sizes else ''})")
+            return asset
+
+    def changes(self, filename: str) -> ChangeLog:
+        """Change history of a map file (kept across invalidations)"""
+        return self._changes.setdefault(filename, ChangeLog())
+
+    def invalidate(self, filename: Optional[str] = None):
+        """Drop one cached file, or everything when no filename is given"""
+        if filename is None:
+            self._assets.clear()
+            self._failures.clear()
+        else:
+            self._assets.pop(filename, None)
+            self._failures.pop(filename, None)
+
+
+# Global singleton instance
+map_cache = MapAssetCache()
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set
+
+# Versions of history kept per file before older diffs are compacted away
+MAX_LOG_VERSIONS = 100
+
+
+def feature_id(feature: Any) -> Optional[str]:
+    """Stable key of a feature (properties.id), or None if it has none"""
+    if not isinstance(feature, dict):
+        return None
+    properties = feature.get("properties")
+    if not isinstance(properties, dict) or properties.get("id") is None:
+        return None
+    return str(properties["id"])
+
+
+def feature_digests(features: List[Dict[str, Any]]) -> Dict[str, bytes]:
+    """id -> content hash of every identifiable feature"""
+    digests: Dict[str, bytes] = {}
+    for feature in features:
+        key = feature_id(feature)
+        if key is None:
+            continue
+        encoded = json.dumps(feature, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        digests[key] = hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).digest()
+    return digests
+
+
+class _Change:
+    """Feature ids touched by one version bump"""
+
+    __slots__ = ("added", "updated", "removed")
+
+    def __init__(self, added: Set[str], updated: Set[str], removed: Set[str]):
+        self.added = added
+        self.updated = updated
+        self.removed = removed
+
+
+class ChangeLog:
+    """Monotonic data version and feature-level change history of one map file"""
+
+    def __init__(self, max_versions: int = MAX_LOG_VERSIONS):
+        self.max_versions = max_versions
+        self.version = 0
+        # Oldest version a diff can still be computed from
+        self.floor = 0
+        self._digests: Dict[str, bytes] = {}
+        self._entries: "OrderedDict[int, _Change]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, features: List[Dict[str, Any]], mtime: float) -> int:
+        """Diff a newly loaded feature list against the previous one and return its version"""
+        digests = feature_digests(features)
+        with self._lock:
+            return self._record(digests, mtime)
+
+    def _record(self, digests: Dict[str, bytes], mtime: float) -> int:
+        if self.version == 0:
+            # Seeding from the file mtime keeps versions increasing across restarts
+            self.version = self.floor = max(1, int(mtime))
+            self._digests = digests
+            return self.version
+
+        previous = self._digests
+        added = {key for key in digests if key not in previous}
+        removed = {key for key in previous if key not in digests}
+        updated = {key for key, digest in digests.items() if key in previous and previous[key] != digest}
+        if not (added or removed or updated):
+            return self.version
+
+        self.version = max(self.version + 1, int(mtime))
+        self._digests = digests
+        self._entries[self.version] = _Change(added, updated, removed)
+
+        # Compact: forget the oldest diffs, clients behind them get a snapshot
+        while len(self._entries) > self.max_versions:
+            version, _ = self._entries.popitem(last=False)
+            self.floor = version
+        return self.version
+
+    def diff(self, since: int, until: int) -> Optional[Dict[str, Set[str]]]:
+        """Net added/updated/removed ids from version `since` to `until` (the current one)
+
+        Returns None when `since` was compacted away or is unknown, or when the
+        log has already moved past `until`.
+        """
+        with self._lock:
+            if until != self.version or since < self.floor or since > self.version:
+                return None
+            return self._diff(since)
+
+    def _diff(self, since: int) -> Dict[str, Set[str]]:
+        # First event per id tells whether it existed at `since`
+        existed: Dict[str, bool] = {}
+        for version, change in self._entries.items():
+            if version <= since:
+                continue
+            for key in change.added:
+                existed.setdefault(key, False)
+            for key in change.updated | change.removed:
+                existed.setdefault(key, True)
+
+        result: Dict[str, Set[str]] = {"added": set(), "updated": set(), "removed": set()}
+        for key, existed_before in existed.items():
+            exists_now = key in self._digests
+            if existed_before and exists_now:
+                result["updated"].add(key)
+            elif exists_now:
+                result["added"].add(key)
+            elif existed_before:
+                result["removed"].add(key)
+        return result
@@ -0,0 +1,89 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from app.services.map_cache import MAP_PATH
+from app.services.spatial_index import point_position
+
+# The catalog every other map file is merged into
+PRIMARY_COLLECTION = "meta"
+
+# collection= name -> map file of stores. Not every file under assets/map is one:
+# districts.json holds district shapes, stores.json a separate store-locator dataset,
+# and editor saves (meta_1018T120000.json) are versions of these files
+STORE_COLLECTIONS = {
+    PRIMARY_COLLECTION: "meta.json",
+    "collectiona": "collectionA.json",
+    "collectionb": "collectionB.json",
+    "collectionc": "collectionC.json",
+    "asias-50-best-bars": "asias-50-best-bars.json",
+}
+
+
+def collection_paths(base_path: Path = MAP_PATH) -> Dict[str, Path]:
+    """Collection name -> map file, the primary collection first"""
+    return {name: base_path / filename for name, filename in STORE_COLLECTIONS.items()}
+
+
+def collections_stamp(base_path: Path = MAP_PATH) -> Tuple[int, int]:
+    """(newest mtime_ns, fingerprint of every file's name, mtime and size); changes when any collection does"""
+    stats = []
+    for name, path in collection_paths(base_path).items():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        stats.append((name, stat.st_mtime_ns, stat.st_size))
+    return (max((mtime for _, mtime, _ in stats), default=0), hash(tuple(stats)))
+
+
+def _is_store(feature: Any) -> bool:
+    # Districts and other shapes have no single point to show as a result
+    if not isinstance(feature, dict) or point_position(feature) is None:
+        return False
+    properties = feature.get("properties")
+    return isinstance(properties, dict) and isinstance(properties.get("id"), str) \
+        and isinstance(properties.get("title"), str) and isinstance(properties.get("type"), str)
+
+
+def merge_collections(primary: List[Dict[str, Any]],
+                      base_path: Path = MAP_PATH) -> Tuple[List[Dict[str, Any]], Dict[str, List[int]]]:
+    """Primary features plus the stores only other map files have, and each collection's ordinals
+
+    A store listed in several files (same id) is kept once, as the first file has it,
+    and every collection refers to that one ordinal.
+    """
+    features = list(primary)
+    ordinals: Dict[str, int] = {}
+    for ordinal, feature in enumerate(features):
+        store_id = feature.get("properties", {}).get("id") if isinstance(feature, dict) else None
+        if isinstance(store_id, str):
+            ordinals.setdefault(store_id, ordinal)
+    members: Dict[str, List[int]] = {PRIMARY_COLLECTION: list(range(len(features)))}
+
+    for name, path in collection_paths(base_path).items():
+        if name == PRIMARY_COLLECTION:
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[map_collections] Skipping {path.name}: {e}")
+            continue
+        collection = data.get("features") if isinstance(data, dict) else None
+        if not isinstance(collection, list):
+            continue
+
+        member_ordinals = []
+        for feature in collection:
+            if not _is_store(feature):
+                continue
+            store_id = feature["properties"]["id"]
+            ordinal = ordinals.get(store_id)
+            if ordinal is None:
+                ordinal = ordinals[store_id] = len(features)
+                features.append(feature)
+            member_ordinals.append(ordinal)
+        members[name] = sorted(set(member_ordinals))
+    return features, members
@@ -0,0 +1,161 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.spatial_index import (
+    BBox,
+    PackedRTree,
+    point_position,
+    project_mercator,
+    unproject_mercator,
+)
+
+# Same defaults as supercluster
+RADIUS = 40  # cluster radius in pixels
+EXTENT = 512  # tile extent the radius is measured against
+MIN_ZOOM = 0
+MAX_ZOOM = 16  # zooms above this show individual points
+
+UNPROCESSED = 1 << 30
+
+
+class _Node:
+    """A point or cluster at one zoom level, in world (Mercator) coordinates"""
+
+    __slots__ = ("x", "y", "count", "ordinal", "cluster_id", "expansion_zoom", "zoom")
+
+    def __init__(self, x: float, y: float, count: int, ordinal: int = -1, cluster_id: int = -1, expansion_zoom: int = 0):
+        self.x = x
+        self.y = y
+        self.count = count
+        # Feature ordinal for single points, -1 for clusters
+        self.ordinal = ordinal
+        self.cluster_id = cluster_id
+        self.expansion_zoom = expansion_zoom
+        # Lowest zoom this node has been processed at (unprocessed until clustered)
+        self.zoom = UNPROCESSED
+
+
+class _Level:
+    """All nodes visible at one zoom, with an R-tree over their positions"""
+
+    def __init__(self, nodes: List[_Node]):
+        self.nodes = nodes
+        boxes = []
+        for node in nodes:
+            lng, lat = unproject_mercator(node.x, node.y)
+            boxes.append((lng, lat, lng, lat))
+        self.tree = PackedRTree(boxes, list(range(len(nodes))))
+
+
+def _within(nodes: List[_Node], grid: Dict[Tuple[int, int], List[int]], node: _Node, radius: float) -> List[int]:
+    """Indices of nodes within radius of node, using a grid with cell size = radius"""
+    cx, cy = int(node.x / radius), int(node.y / radius)
+    r2 = radius * radius
+    found = []
+    for gx in (cx - 1, cx, cx + 1):
+        for gy in (cy - 1, cy, cy + 1):
+            for i in grid.get((gx, gy), ()):
+                other = nodes[i]
+                dx = other.x - node.x
+                dy = other.y - node.y
+                if dx * dx + dy * dy <= r2:
+                    found.append(i)
+    return found
+
+
+class ClusterIndex:
+    """Hierarchical point clusters for every zoom level (supercluster-style greedy clustering)"""
+
+    def __init__(self, features: List[Dict[str, Any]], radius: int = RADIUS, extent: int = EXTENT,
+                 min_zoom: int = MIN_ZOOM, max_zoom: int = MAX_ZOOM):
+        self.features = features
+        self.radius = radius
+        self.extent = extent
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self._next_cluster_id = len(features)
+
+        nodes: List[_Node] = []
+        for ordinal, feature in enumerate(features):
+            position = point_position(feature)
+            if position is None:
+                continue
+            x, y = project_mercator(*position)
+            nodes.append(_Node(x, y, 1, ordinal=ordinal))
+
+        # levels[z] holds what is visible at zoom z; max_zoom + 1 is the raw points
+        self.levels: Dict[int, _Level] = {max_zoom + 1: _Level(nodes)}
+        for zoom in range(max_zoom, min_zoom - 1, -1):
+            nodes = self._cluster(nodes, zoom)
+            self.levels[zoom] = _Level(nodes)
+
+    def _cluster(self, nodes: List[_Node], zoom: int) -> List[_Node]:
+        radius = self.radius / (self.extent * (1 << zoom))
+        grid: Dict[Tuple[int, int], List[int]] = {}
+        for i, node in enumerate(nodes):
+            grid.setdefault((int(node.x / radius), int(node.y / radius)), []).append(i)
+
+        clustered: List[_Node] = []
+        for node in nodes:
+            if node.zoom <= zoom:
+                continue
+            node.zoom = zoom
+
+            neighbors = [nodes[i] for i in _within(nodes, grid, node, radius) if nodes[i].zoom > zoom]
+            if not neighbors:
+                # Nothing to merge with: carry the node up unchanged
+                clustered.append(node)
+                continue
+
+            # Count-weighted centroid of the node and everything around it
+            count = node.count
+            wx = node.x * node.count
+            wy = node.y * node.count
+            for neighbor in neighbors:
+                neighbor.zoom = zoom
+                count += neighbor.count
+                wx += neighbor.x * neighbor.count
+                wy += neighbor.y * neighbor.count
+
+            cluster = _Node(wx / count, wy / count, count, cluster_id=self._next_cluster_id, expansion_zoom=zoom + 1)
+            self._next_cluster_id += 1
+            clustered.append(cluster)
+
+        return clustered
+
+    def _feature(self, node: _Node) -> Dict[str, Any]:
+        if node.ordinal >= 0:
+            return self.features[node.ordinal]
+        lng, lat = unproject_mercator(node.x, node.y)
+        return {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lng, lat]},
+            "properties": {
+                "cluster": True,
+                "cluster_id": node.cluster_id,
+                "point_count": node.count,
+                "expansion_zoom": min(node.expansion_zoom, self.max_zoom + 1),
+            },
+        }
+
+    def get_clusters(self, bbox: BBox, zoom: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Clusters and unclustered points visible in bbox at a zoom level"""
+        zoom = max(self.min_zoom, min(zoom, self.max_zoom + 1))
+        level = self.levels[zoom]
+
+        min_lng, min_lat, max_lng, max_lat = bbox
+        if min_lng <= max_lng:
+            indices = level.tree.search(min_lng, min_lat, max_lng, max_lat)
+        else:
+            # Viewport wraps across 180°
+            indices = sorted(set(
+                level.tree.search(min_lng, min_lat, 180.0, max_lat)
+                + level.tree.search(-180.0, min_lat, max_lng, max_lat)
+            ))
+        if limit is not None:
+            indices = indices[:limit]
+        return [self._feature(level.nodes[i]) for i in indices]
+
+
+def build_cluster_index(asset) -> ClusterIndex:
+    """Builder for MapAsset.derive()"""
+    return ClusterIndex(asset.features)
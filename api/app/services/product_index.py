@@ -0,0 +1,176 @@
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from functools import reduce
+from operator import and_, or_
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.text_index import PRODUCT_SLOTS
+from app.services.text_normalize import tokenize
+from app.utils import bitset
+
+# Symbols that name one currency
+CURRENCY_SYMBOLS = {"NT$": "TWD", "HK$": "HKD", "US$": "USD", "S$": "SGD", "€": "EUR", "£": "GBP", "₩": "KRW", "฿": "THB"}
+# Symbols several currencies use, read as the currency of the store's country
+LOCAL_SYMBOLS = ("$", "¥", "円", "元")
+# Store id prefix -> the currency a bare "$" or "¥" means there ("FM" is Taiwan)
+LOCAL_CURRENCIES = {"FM": "TWD", "TW": "TWD", "JP": "JPY", "SG": "SGD", "US": "USD",
+                    "HK": "HKD", "CN": "CNY", "KR": "KRW", "TH": "THB"}
+CURRENCIES = frozenset(CURRENCY_SYMBOLS.values()) | frozenset(LOCAL_CURRENCIES.values())
+
+# Longest symbols first, so "NT$330" is not read as "$330"
+_SYMBOL = "|".join(re.escape(symbol) for symbol in sorted(CURRENCY_SYMBOLS, key=len, reverse=True))
+_AMOUNT = r"(\d[\d,]*(?:\.\d+)?)"
+# "NT$330", "¥1,320(Taxed)", "TWD 330"; then "330円", "330 TWD"
+_PREFIXED = re.compile(rf"({_SYMBOL}|[$¥]|\b[A-Z]{{3}}\b)\s?{_AMOUNT}")
+_SUFFIXED = re.compile(rf"{_AMOUNT}\s?([円元]|\b[A-Z]{{3}}\b)")
+
+# Sorts after any character, used as the upper bound of a prefix range
+_WORD_END = chr(0x10FFFF)
+
+
+def _currency(symbol: str, country: Optional[str]) -> Optional[str]:
+    if symbol in CURRENCY_SYMBOLS:
+        return CURRENCY_SYMBOLS[symbol]
+    if symbol in LOCAL_SYMBOLS:
+        return LOCAL_CURRENCIES.get(country or "")
+    return symbol if symbol in CURRENCIES else None
+
+
+def parse_price(text: Any, country: Optional[str] = None) -> Optional[Tuple[str, float]]:
+    """(ISO currency, amount) of a menu price, None when it has none we can read
+
+    Where several prices are listed ("$2.99(16oz) / $3.99(24oz)") the lowest counts;
+    add-ons after the first price ("NT$240+100") carry no symbol and are ignored.
+    """
+    if not isinstance(text, str) or not text.strip():
+        return None
+    # Full-width digits and ￥ fold to ASCII and ¥
+    text = unicodedata.normalize("NFKC", text)
+    prices = []
+    for symbol, amount in _PREFIXED.findall(text):
+        prices.append((_currency(symbol, country), amount))
+    if not prices:
+        prices = [(_currency(symbol, country), amount) for amount, symbol in _SUFFIXED.findall(text)]
+    parsed = []
+    for currency, amount in prices:
+        if currency is None:
+            continue
+        try:
+            parsed.append((float(amount.replace(",", "")), currency))
+        except ValueError:
+            continue
+    if not parsed:
+        return None
+    amount, currency = min(parsed)
+    return currency, amount
+
+
+def _country(feature: Dict[str, Any]) -> Optional[str]:
+    store_id = feature.get("properties", {}).get("id")
+    return store_id.split("_", 1)[0] if isinstance(store_id, str) and "_" in store_id else None
+
+
+class ProductIndex:
+    """Named products of every store with their parsed prices
+
+    Products are numbered in store order, so a store's products are one range of
+    numbers. Name and description words map to bitsets of product numbers, and each currency
+    keeps its priced products sorted by amount, so a price range is two bisects.
+    """
+
+    def __init__(self, features: List[Dict[str, Any]], details: List[Optional[Dict[str, Any]]]):
+        # Per product: store ordinal, name, price as written, parsed (currency, amount)
+        self.stores: List[int] = []
+        self.names: List[str] = []
+        self.labels: List[str] = []
+        self.prices: List[Optional[Tuple[str, float]]] = []
+        # store ordinal -> (first, end) product numbers
+        self.ranges: Dict[int, Tuple[int, int]] = {}
+        words: Dict[str, List[int]] = {}
+        priced: Dict[str, List[Tuple[float, int]]] = {}
+
+        for ordinal, store_details in enumerate(details):
+            if not store_details:
+                continue
+            country = _country(features[ordinal])
+            first = len(self.names)
+            for slot in PRODUCT_SLOTS:
+                product = store_details.get(slot)
+                name = product.get("name") if isinstance(product, dict) else None
+                if not isinstance(name, str) or not name.strip():
+                    continue
+                number = len(self.names)
+                label = product.get("price") if isinstance(product.get("price"), str) else ""
+                price = parse_price(label, country)
+                self.stores.append(ordinal)
+                self.names.append(name)
+                self.labels.append(label)
+                self.prices.append(price)
+                # Only the item's own text: a store's product tags (producttags=) say
+                # nothing about which of its items they apply to
+                description = product.get("description") if isinstance(product.get("description"), str) else ""
+                for word in set(tokenize(name)) | set(tokenize(description)):
+                    words.setdefault(word, []).append(number)
+                if price is not None:
+                    priced.setdefault(price[0], []).append((price[1], number))
+            if len(self.names) > first:
+                self.ranges[ordinal] = (first, len(self.names))
+
+        self.size = len(self.names)
+        self.all_bits = bitset.full(self.size)
+        self.word_bits = {word: bitset.from_ordinals(numbers) for word, numbers in words.items()}
+        # Sorted vocabulary, so the last word of a query can match as a prefix
+        self.words = sorted(self.word_bits)
+        # currency -> amounts ascending, and the product number of each
+        self.amounts: Dict[str, List[float]] = {}
+        self.numbers: Dict[str, List[int]] = {}
+        for currency, entries in priced.items():
+            entries.sort()
+            self.amounts[currency] = [amount for amount, _ in entries]
+            self.numbers[currency] = [number for _, number in entries]
+
+    def _word_mask(self, word: str, prefix: bool) -> int:
+        if not prefix:
+            return self.word_bits.get(word, 0)
+        start = bisect_left(self.words, word)
+        end = bisect_left(self.words, word + _WORD_END, start)
+        return reduce(or_, (self.word_bits[match] for match in self.words[start:end]), 0)
+
+    def match(self, product: Optional[str] = None, currency: Optional[str] = None,
+              min_price: Optional[float] = None, max_price: Optional[float] = None) -> int:
+        """Bitset of the product numbers matching every given condition
+
+        Every word of product must be in the item's name or description, the last
+        one as a prefix ("mat" finds "Matcha Latte"). A price range needs currency.
+        """
+        masks = [self.all_bits]
+        words = tokenize(product) if product else []
+        for position, word in enumerate(words):
+            masks.append(self._word_mask(word, prefix=position == len(words) - 1))
+        if currency is not None:
+            amounts = self.amounts.get(currency, [])
+            start = bisect_left(amounts, min_price) if min_price is not None else 0
+            end = bisect_right(amounts, max_price) if max_price is not None else len(amounts)
+            masks.append(bitset.from_ordinals(self.numbers.get(currency, [])[start:end]))
+        return reduce(and_, masks)
+
+    def store_mask(self, products: int) -> int:
+        """Bitset of the stores owning any of the products"""
+        return bitset.from_ordinals({self.stores[number] for number in bitset.iter_ordinals(products)})
+
+    def store_products(self, ordinal: int, products: int) -> List[Dict[str, Any]]:
+        """The products of one store within products, in menu order"""
+        first, end = self.ranges.get(ordinal, (0, 0))
+        allowed = bitset.BitTest(products)
+        found = []
+        for number in range(first, end):
+            if number in allowed:
+                price = self.prices[number]
+                found.append({
+                    "name": self.names[number],
+                    "price": self.labels[number],
+                    "currency": price[0] if price is not None else None,
+                    "amount": price[1] if price is not None else None,
+                })
+        return found
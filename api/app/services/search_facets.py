@@ -0,0 +1,79 @@
+from typing import Any, Dict, List, Tuple
+
+from app.utils import bitset
+
+# Facets reported with search results, in response order
+FACETS = ("type", "storetag", "producttag", "layout", "country")
+
+
+def _single(value: Any) -> Tuple[str, ...]:
+    return (value,) if isinstance(value, str) and value else ()
+
+
+def _many(values: Any) -> Tuple[str, ...]:
+    if not isinstance(values, list):
+        return ()
+    # A tag listed twice on one store still counts once
+    return tuple(dict.fromkeys(value for value in values if isinstance(value, str) and value))
+
+
+def feature_facets(feature: Dict[str, Any]) -> Dict[str, Tuple[str, ...]]:
+    """Facet values of one feature; the country is the prefix of its id (e.g. "TW" in "TW_...")"""
+    properties = feature.get("properties", {})
+    store_id = properties.get("id")
+    country = store_id.split("_", 1)[0] if isinstance(store_id, str) and "_" in store_id else None
+    return {
+        "type": _single(properties.get("type")),
+        "storetag": _many(properties.get("storetag")),
+        "producttag": _many(properties.get("producttag")),
+        "layout": _single(properties.get("layout")),
+        "country": _single(country),
+    }
+
+
+def sorted_counts(counts: Dict[str, int]) -> Dict[str, int]:
+    """Most common values first, ties alphabetical"""
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+
+def facet_bits(values: Dict[str, List[Tuple[str, ...]]]) -> Dict[str, Dict[str, int]]:
+    """facet -> value -> bitset of the ordinals carrying it"""
+    ordinals: Dict[str, Dict[str, List[int]]] = {name: {} for name in values}
+    for name, per_ordinal in values.items():
+        for ordinal, facet_values in enumerate(per_ordinal):
+            for value in facet_values:
+                ordinals[name].setdefault(value, []).append(ordinal)
+    return {
+        name: {value: bitset.from_ordinals(members) for value, members in per_value.items()}
+        for name, per_value in ordinals.items()
+    }
+
+
+class FacetCounts:
+    """Per-facet value counts, filled one matching ordinal at a time or from a bitset of matches"""
+
+    def __init__(self, values: Dict[str, List[Tuple[str, ...]]], bits: Dict[str, Dict[str, int]]):
+        self._values = values
+        self._bits = bits
+        self.counts: Dict[str, Dict[str, int]] = {name: {} for name in values}
+        self.total = 0
+
+    def add(self, ordinal: int):
+        self.total += 1
+        for name, per_ordinal in self._values.items():
+            counts = self.counts[name]
+            for value in per_ordinal[ordinal]:
+                counts[value] = counts.get(value, 0) + 1
+
+    def add_mask(self, mask: int):
+        """Count a whole set of matches at once: one AND + popcount per facet value"""
+        self.total += mask.bit_count()
+        for name, per_value in self._bits.items():
+            counts = self.counts[name]
+            for value, bits in per_value.items():
+                count = (mask & bits).bit_count()
+                if count:
+                    counts[value] = counts.get(value, 0) + count
+
+    def as_dict(self) -> Dict[str, Dict[str, int]]:
+        return {name: sorted_counts(counts) for name, counts in self.counts.items()}
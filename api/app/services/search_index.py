@@ -0,0 +1,528 @@
+import heapq
+import math
+from bisect import bisect_left, bisect_right
+from functools import reduce
+from itertools import chain, islice
+from operator import and_, or_
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.services.fuzzy_index import FuzzyIndex, edit_distance, max_distance
+from app.services.search_facets import FACETS, FacetCounts, facet_bits, feature_facets
+from app.services.spatial_index import (
+    MAX_DISTANCE_M,
+    FeatureIndex,
+    haversine_m,
+    point_position,
+    radius_bbox,
+)
+from app.services.text_index import FullTextIndex
+from app.services.text_normalize import normalize
+from app.utils import bitset
+from app.utils.lru import LRUCache
+
+# Longest n-gram kept in the postings; shorter queries look up their own gram
+GRAM_SIZE = 3
+
+# Sorts after any character, used as the upper bound of a prefix range
+_PREFIX_END = chr(0x10FFFF)
+
+# Suggestions returned by /suggestions
+SUGGESTION_LIMIT = 10
+
+
+def _grams(text: str) -> Dict[str, int]:
+    """Every distinct substring of text up to GRAM_SIZE characters -> where it first occurs"""
+    grams: Dict[str, int] = {}
+    for size in range(1, GRAM_SIZE + 1):
+        for start in range(len(text) - size + 1):
+            grams.setdefault(text[start:start + size], start)
+    return grams
+
+
+# Highest score a type-only match can get
+TYPE_SCORE_MAX = 1.3
+
+# Fuzzy title matches rank below every exact tier, losing 0.1 per typo after the first
+FUZZY_SCORE = 1.0
+FUZZY_SCORE_MIN = 0.5
+
+
+def type_score(query: str, store_type: str) -> float:
+    """Type tiers of calculate_relevance_score on pre-lowered strings"""
+    if store_type == query:
+        return 1.3
+    if store_type.startswith(query):
+        return 1.2
+    if query in store_type:
+        return 1.1
+    return 0.0
+
+
+# First radius tried by a nearest-first listing without radius_m; grows 4x per round
+NEAREST_START_M = 1000.0
+
+# Count facets from a bitset once more than 1/FACET_BITSET_RATIO of the catalog matches
+FACET_BITSET_RATIO = 64
+
+# Queries whose full ranking and hit bitset are kept for paging and facet counts
+SCORE_CACHE_SIZE = 64
+
+
+def fuzzy_score(distance: int) -> float:
+    return max(FUZZY_SCORE_MIN, FUZZY_SCORE - 0.1 * max(distance - 1, 0))
+
+
+# Description/product matches rank below every title, type and fuzzy tier, scaled by
+# their BM25 score relative to the best one for the query
+TEXT_SCORE_MAX = 0.45
+
+
+class SearchIndex:
+    """Pre-normalized titles and types with prefix and n-gram lookups for store search"""
+
+    def __init__(self, features: List[Dict[str, Any]], text: Optional[FullTextIndex] = None,
+                 collections: Optional[Dict[str, List[int]]] = None):
+        self.size = len(features)
+        # Full-text index over store details, when they were loaded
+        self.text = text
+        self.display_titles: List[str] = []
+        self.titles: List[str] = []
+        # gram -> first position in the title -> ordinals, so short infix lookups come out by position
+        self.grams: Dict[str, Dict[int, List[int]]] = {}
+        self.gram_counts: Dict[str, int] = {}
+        self.type_postings: Dict[str, List[int]] = {}
+        # facet -> per-ordinal values, and facet -> value -> count over the whole catalog
+        self.facet_values: Dict[str, List[Tuple[str, ...]]] = {name: [] for name in FACETS}
+        self.facet_dictionaries: Dict[str, Dict[str, int]] = {}
+        # Lowercased storetag / producttag -> ordinals, turned into bitsets below
+        storetag_ordinals: Dict[str, List[int]] = {}
+        producttag_ordinals: Dict[str, List[int]] = {}
+
+        for ordinal, feature in enumerate(features):
+            properties = feature.get("properties", {})
+            display_title = properties.get("title") or ""
+            title = normalize(display_title)
+            store_type = (properties.get("type") or "").lower()
+            self.display_titles.append(display_title)
+            self.titles.append(title)
+            for tag in {tag.lower() for tag in properties.get("storetag") or [] if tag}:
+                storetag_ordinals.setdefault(tag, []).append(ordinal)
+            for tag in {tag.lower() for tag in properties.get("producttag") or [] if tag}:
+                producttag_ordinals.setdefault(tag, []).append(ordinal)
+            for gram, position in _grams(title).items():
+                self.grams.setdefault(gram, {}).setdefault(position, []).append(ordinal)
+                self.gram_counts[gram] = self.gram_counts.get(gram, 0) + 1
+            self.type_postings.setdefault(store_type, []).append(ordinal)
+            for name, values in feature_facets(feature).items():
+                self.facet_values[name].append(values)
+
+        # Collection name -> member ordinals; a store in several map files is one ordinal
+        collections = {name.lower(): ordinals for name, ordinals in (collections or {}).items()}
+        if collections:
+            memberships: List[List[str]] = [[] for _ in range(self.size)]
+            for name, ordinals in collections.items():
+                for ordinal in ordinals:
+                    memberships[ordinal].append(name)
+            self.facet_values["collection"] = [tuple(names) for names in memberships]
+
+        # Filter bitsets over the feature ordinals
+        self.all_bits = bitset.full(self.size)
+        self.type_bits = {value: bitset.from_ordinals(ordinals) for value, ordinals in self.type_postings.items()}
+        self.storetag_bits = {value: bitset.from_ordinals(ordinals) for value, ordinals in storetag_ordinals.items()}
+        self.producttag_bits = {value: bitset.from_ordinals(ordinals) for value, ordinals in producttag_ordinals.items()}
+        self.collection_bits = {name: bitset.from_ordinals(ordinals) for name, ordinals in collections.items()}
+
+        self.facet_bits = facet_bits(self.facet_values)
+        catalog = self.facet_counts()
+        catalog.add_mask(self.all_bits)
+        self.facet_dictionaries = catalog.as_dict()
+
+        # Order each position bucket by title (sort is stable, so equal titles keep feature order)
+        for buckets in self.grams.values():
+            for bucket in buckets.values():
+                bucket.sort(key=self.titles.__getitem__)
+
+        # Sorted prefix array: (title, ordinal) pairs, so equal titles stay in feature order
+        self.prefixes: List[Tuple[str, int]] = sorted((title, ordinal) for ordinal, title in enumerate(self.titles))
+
+        # Word-level trigram index for typo-tolerant matching
+        self.fuzzy = FuzzyIndex(self.titles)
+
+        # R-tree over geometry.coordinates for near= queries
+        self.positions: List[Optional[Tuple[float, float]]] = [point_position(feature) for feature in features]
+        # Features without a point sort after every distance
+        self.placed_bits = bitset.from_ordinals(ordinal for ordinal, position in enumerate(self.positions)
+                                                if position is not None)
+        self.spatial = FeatureIndex(features)
+
+        # Sorted hits and hit bitset of recent queries, so later pages and facet counts skip rescoring
+        self._score_cache = LRUCache(SCORE_CACHE_SIZE)
+
+    def facet_counts(self) -> FacetCounts:
+        """Empty counters to pass to search()"""
+        return FacetCounts(self.facet_values, self.facet_bits)
+
+    def _prefix_bounds(self, prefix: str) -> Tuple[int, int]:
+        start = bisect_left(self.prefixes, (prefix,))
+        end = bisect_left(self.prefixes, (prefix + _PREFIX_END,), start)
+        return start, end
+
+    def _infix_matches(self, query: str) -> Iterator[Tuple[int, int]]:
+        """(position, ordinal) of every title containing query after its first character"""
+        if len(query) <= GRAM_SIZE:
+            # The query is itself a gram: its buckets already hold first positions
+            for position, ordinals in self.grams.get(query, {}).items():
+                if position > 0:
+                    for ordinal in ordinals:
+                        yield position, ordinal
+            return
+
+        # Longer queries: verify the postings of the rarest query gram
+        rarest: Optional[str] = None
+        for start in range(len(query) - GRAM_SIZE + 1):
+            gram = query[start:start + GRAM_SIZE]
+            if gram not in self.grams:
+                return
+            if rarest is None or self.gram_counts[gram] < self.gram_counts[rarest]:
+                rarest = gram
+        titles = self.titles
+        for ordinal in chain.from_iterable(self.grams[rarest].values()):
+            position = titles[ordinal].find(query)
+            if position > 0:
+                yield position, ordinal
+
+    def _title_scores(self, query: str) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+
+        # Exact and prefix title tiers come straight from the sorted array
+        start, end = self._prefix_bounds(query)
+        for title, ordinal in self.prefixes[start:end]:
+            scores[ordinal] = 2.0 if title == query else 1.8
+
+        # Substring tier. Like the linear scan, a late enough match scores <= 0 and
+        # is dropped without falling through to the type tiers
+        for position, ordinal in self._infix_matches(query):
+            scores[ordinal] = 1.5 - (position * 0.01)
+        return scores
+
+    def _add_type_scores(self, query: str, scores: Dict[int, float]):
+        # Score each distinct type once; title matches keep their title score
+        for store_type, ordinals in self.type_postings.items():
+            score = type_score(query, store_type)
+            if score <= 0:
+                continue
+            for ordinal in ordinals:
+                if ordinal not in scores:
+                    scores[ordinal] = score
+
+    def _add_fuzzy_scores(self, query: str, scores: Dict[int, float]):
+        # Only features nothing else matched; a late substring match (score <= 0) is
+        # close enough to count as a fuzzy one
+        for ordinal, distance in self.fuzzy.match(query).items():
+            if scores.get(ordinal, 0) <= 0:
+                scores[ordinal] = fuzzy_score(distance)
+
+        # Types are few, so each distinct one is compared directly
+        limit = max_distance(query)
+        for store_type, ordinals in self.type_postings.items():
+            distance = edit_distance(query, store_type, limit) if store_type else None
+            if distance is None:
+                continue
+            score = fuzzy_score(distance)
+            for ordinal in ordinals:
+                if scores.get(ordinal, 0) < score:
+                    scores[ordinal] = score
+
+    def _add_text_scores(self, query: str, scores: Dict[int, float]):
+        if self.text is None:
+            return
+        text_scores = self.text.score(query)
+        if not text_scores:
+            return
+        best = max(text_scores.values())
+        # Only features nothing else matched, like the fuzzy tier
+        for ordinal, score in text_scores.items():
+            if scores.get(ordinal, 0) <= 0:
+                scores[ordinal] = TEXT_SCORE_MAX * score / best
+
+    def score(self, query: str, fuzzy: bool = False) -> Dict[int, float]:
+        """ordinal -> relevance for every matching feature; non-matching ones are never visited"""
+        query = normalize(query)
+        scores = self._title_scores(query)
+        self._add_type_scores(query, scores)
+        if fuzzy:
+            self._add_fuzzy_scores(query, scores)
+        self._add_text_scores(query, scores)
+        return {ordinal: score for ordinal, score in scores.items() if score > 0}
+
+    def filter_mask(self, store_type: Optional[str] = None, tags: Optional[List[str]] = None,
+                    tags_mode: str = "any", exclude_tags: Optional[List[str]] = None,
+                    producttags: Optional[List[str]] = None,
+                    collections: Optional[List[str]] = None) -> Optional[int]:
+        """Bitset of the features passing every filter, or None when nothing is filtered
+
+        tags and producttags match any (OR) or all (AND) of their values depending on
+        tags_mode; exclude_tags drops features carrying any of its store tags;
+        collections keeps features of any of the named map files.
+        """
+        masks = []
+        if store_type:
+            masks.append(self.type_bits.get(store_type.lower(), 0))
+        if collections:
+            masks.append(reduce(or_, (self.collection_bits.get(name.lower(), 0) for name in collections)))
+        combine = and_ if tags_mode == "all" else or_
+        for values, bits in ((tags, self.storetag_bits), (producttags, self.producttag_bits)):
+            if values:
+                masks.append(reduce(combine, (bits.get(value.lower(), 0) for value in values)))
+        if exclude_tags:
+            excluded = reduce(or_, (self.storetag_bits.get(tag.lower(), 0) for tag in exclude_tags))
+            masks.append(self.all_bits & ~excluded)
+        return reduce(and_, masks) if masks else None
+
+    def distance(self, ordinal: int, lng: float, lat: float) -> Optional[float]:
+        """Meters from (lng, lat) to a feature, None when it has no point geometry"""
+        position = self.positions[ordinal]
+        if position is None:
+            return None
+        return haversine_m(lng, lat, position[0], position[1])
+
+    def within_radius(self, lng: float, lat: float, radius_m: float) -> Dict[int, float]:
+        """ordinal -> distance for features within radius_m; distances are only computed
+        for the R-tree candidates inside the circle's bounding box"""
+        found: Dict[int, float] = {}
+        for ordinal in self.spatial.query(radius_bbox(lng, lat, radius_m)):
+            distance = self.distance(ordinal, lng, lat)
+            if distance is not None and distance <= radius_m:
+                found[ordinal] = distance
+        return found
+
+    def _nearest(self, lng: float, lat: float, mask: Optional[int], count: int,
+                 after: Optional[tuple] = None) -> List[Tuple[float, int]]:
+        """(distance, ordinal) of the count nearest features in mask, searching ever larger circles
+
+        Features without a point come last at distance inf, in feature order, like a full sort.
+        With after, a (distance, ordinal) cursor key, only features past it count, and the
+        circles start at the cursor's distance.
+        """
+        allowed = bitset.BitTest(mask) if mask is not None else None
+        candidates = mask if mask is not None else self.all_bits
+        available = (candidates & self.placed_bits).bit_count()
+        # Nothing nearer than the cursor can follow it
+        floor = after[0] if after is not None else 0.0
+        nearest: List[Tuple[float, int]] = []
+        if floor < math.inf:
+            radius = floor + NEAREST_START_M
+            while True:
+                inside = [
+                    (distance, ordinal) for ordinal, distance in self.within_radius(lng, lat, radius).items()
+                    if allowed is None or ordinal in allowed
+                ]
+                nearby = inside if after is None else [item for item in inside if item > after]
+                # Anything outside the circle is farther than everything in it
+                if len(nearby) >= count or len(inside) >= available or radius >= MAX_DISTANCE_M:
+                    break
+                radius = min(floor + (radius - floor) * 4, MAX_DISTANCE_M)
+            nearest = heapq.nsmallest(count, nearby)
+        if len(nearest) < count:
+            unplaced = candidates & ~self.placed_bits
+            if after is not None and after[0] == math.inf:
+                # The cursor is among the unplaced ones, which go in feature order
+                unplaced &= ~((1 << (int(after[1]) + 1)) - 1)
+            nearest.extend((math.inf, ordinal) for ordinal in islice(bitset.iter_ordinals(unplaced), count - len(nearest)))
+        return nearest
+
+    def search(self, query: Optional[str], mask: Optional[int] = None, limit: Optional[int] = None,
+               fuzzy: bool = False, facets: Optional[FacetCounts] = None,
+               near: Optional[Tuple[float, float]] = None, radius_m: Optional[float] = None,
+               sort: str = "relevance", after: Optional[tuple] = None) -> List[int]:
+        """Ranked ordinals of features in mask (see filter_mask): by score, ties in feature order
+
+        near=(lng, lat) with radius_m keeps only features within the radius; with
+        sort="distance" results are nearest first (ties by score, then feature order).
+        When facets is given it is filled with the counts of every match, not just the
+        returned page; a query's first faceted search scores it in full and keeps the
+        hits, so the next ones only mask a bitset.
+        after is the sort key of the last result of the previous page (see ranked()).
+        """
+        return [ordinal for _, ordinal in self.ranked(query, mask, limit, fuzzy, facets, near, radius_m, sort, after)]
+
+    def ranked(self, query: Optional[str], mask: Optional[int] = None, limit: Optional[int] = None,
+               fuzzy: bool = False, facets: Optional[FacetCounts] = None,
+               near: Optional[Tuple[float, float]] = None, radius_m: Optional[float] = None,
+               sort: str = "relevance", after: Optional[tuple] = None) -> List[Tuple[tuple, int]]:
+        """(sort key, ordinal) of each result of search(), in order
+
+        Keys are (ordinal,) when listing, (-score, ordinal) when ranking, and start
+        with the distance under sort="distance". Results come strictly after the
+        after key, so passing the last key of a page yields the next page.
+        """
+        # Negative limits keep list-slice semantics, so only a non-negative one bounds the work
+        bound = limit if limit is not None and limit >= 0 else None
+
+        distances: Optional[Dict[int, float]] = None
+        if near is not None and radius_m is not None:
+            distances = self.within_radius(near[0], near[1], radius_m)
+            in_radius = bitset.from_ordinals(distances)
+            mask = in_radius if mask is None else mask & in_radius
+        by_distance = near is not None and sort == "distance"
+
+        if not query:
+            # Unranked listing: the filter bitset is the match set, so facets come
+            # straight from it and only the returned page is walked
+            if facets is not None:
+                facets.add_mask(mask if mask is not None else self.all_bits)
+            if by_distance:
+                if distances is None and bound is not None:
+                    # Every page, not just the first, grows circles from the cursor
+                    return [((distance, ordinal), ordinal)
+                            for distance, ordinal in self._nearest(near[0], near[1], mask, bound, after)]
+                matches = bitset.iter_ordinals(mask) if mask is not None else range(self.size)
+                keys = ((self._distance_key(near, ordinal, distances), ordinal) for ordinal in matches)
+                return self._top(((key, key[-1]) for key in keys), bound, limit, after)
+            if after is not None:
+                # Features are listed in ordinal order, so resuming drops every bit up to the cursor
+                start = min(max(int(after[0]) + 1, 0), self.size)
+                mask = (mask if mask is not None else self.all_bits) & ~((1 << start) - 1)
+            candidates = bitset.iter_ordinals(mask) if mask is not None else range(self.size)
+            results = []
+            for ordinal in candidates:
+                if bound is not None and len(results) >= bound:
+                    break
+                results.append(((ordinal,), ordinal))
+            return results[:limit]
+
+        query = normalize(query)
+        allowed = bitset.BitTest(mask) if mask is not None else None
+        # Every hit of the query, sorted, with their bitset. Built once per query: later
+        # pages resume from it with a bisect, and facet counts are the bitset masked
+        # by the filters, so counting facets doesn't make page 1 score every tier
+        hits_key = (query, fuzzy)
+        scored = self._score_cache.get(hits_key)
+        if scored is None and (after is not None or facets is not None):
+            scored = self._score_cache.get_or_build(hits_key, lambda: self._scored(query, fuzzy))
+
+        if facets is not None:
+            matches = scored[1] if mask is None else scored[1] & mask
+            if matches.bit_count() * FACET_BITSET_RATIO > self.size:
+                # Many hits: one popcount per facet value beats touching each hit
+                facets.add_mask(matches)
+            else:
+                for ordinal in bitset.iter_ordinals(matches):
+                    facets.add(ordinal)
+
+        if scored is not None:
+            if not by_distance:
+                return self._resume(scored[0], allowed, bound, limit, after)
+            hits = [hit for hit in scored[0] if allowed is None or hit[1] in allowed]
+        else:
+            scores = self._title_scores(query)
+            if allowed is not None:
+                scores = {ordinal: score for ordinal, score in scores.items() if ordinal in allowed}
+            # Type, fuzzy and full-text tiers score at most TYPE_SCORE_MAX, so skip them
+            # once enough title hits beat that (by distance, any match may come first)
+            if bound is None or by_distance or \
+                    sum(1 for score in scores.values() if score > TYPE_SCORE_MAX) < bound:
+                self._add_type_scores(query, scores)
+                if fuzzy:
+                    self._add_fuzzy_scores(query, scores)
+                self._add_text_scores(query, scores)
+                if allowed is not None:
+                    scores = {ordinal: score for ordinal, score in scores.items() if ordinal in allowed}
+            hits = [(-score, ordinal) for ordinal, score in scores.items() if score > 0]
+
+        if by_distance:
+            # Distance first, then relevance, then feature order
+            keyed = (((self._distance_key(near, hit[1], distances),) + hit, hit[1]) for hit in hits)
+            return self._top(keyed, bound, limit, after)
+        return self._top(((hit, hit[1]) for hit in hits), bound, limit, after)
+
+    def _scored(self, query: str, fuzzy: bool) -> Tuple[List[Tuple[float, int]], int]:
+        """(-score, ordinal) of every hit of an unfiltered query, best first, and their bitset"""
+        ranking = sorted((-score, ordinal) for ordinal, score in self.score(query, fuzzy).items() if score > 0)
+        return ranking, bitset.from_ordinals(ordinal for _, ordinal in ranking)
+
+    @staticmethod
+    def _resume(ranking: List[Tuple[float, int]], allowed: Optional[bitset.BitTest], bound: Optional[int],
+                limit: Optional[int], after: Optional[tuple]) -> List[Tuple[tuple, int]]:
+        """The hits in allowed that follow the cursor key (all of them without one) in a sorted ranking"""
+        results = []
+        start = bisect_right(ranking, after) if after is not None else 0
+        for position in range(start, len(ranking)):
+            if bound is not None and len(results) >= bound:
+                break
+            hit = ranking[position]
+            if allowed is None or hit[1] in allowed:
+                results.append((hit, hit[1]))
+        return results[:limit]
+
+    @staticmethod
+    def _top(keyed: Iterable[Tuple[tuple, int]], bound: Optional[int], limit: Optional[int],
+             after: Optional[tuple]) -> List[Tuple[tuple, int]]:
+        """The first bound (key, ordinal) pairs after the cursor key, by key"""
+        if after is not None:
+            keyed = (item for item in keyed if item[0] > after)
+        if bound is not None:
+            # Bounded heap instead of sorting every hit
+            return heapq.nsmallest(bound, keyed)
+        return sorted(keyed)[:limit]
+
+    def _distance_key(self, near: Tuple[float, float], ordinal: int,
+                      known: Optional[Dict[int, float]]) -> float:
+        """Distance used for ordering; features without a point go last"""
+        distance = known.get(ordinal) if known is not None else None
+        if distance is None:
+            distance = self.distance(ordinal, near[0], near[1])
+        return distance if distance is not None else math.inf
+
+    def suggest(self, query: str, limit: int = SUGGESTION_LIMIT, fuzzy: bool = False) -> List[int]:
+        """Top titles for autocomplete: prefix matches, then infix matches by position,
+        then (with fuzzy) near-misses by typo count, each ordered by title and then feature order"""
+        query = normalize(query)
+        if limit <= 0:
+            return []
+
+        # Prefix tier: the sorted array is already in (title, ordinal) order
+        start, end = self._prefix_bounds(query)
+        results = [ordinal for _, ordinal in self.prefixes[start:min(end, start + limit)]]
+        needed = limit - len(results)
+        if needed <= 0:
+            return results
+
+        # Infix tier: walk the buckets of the query's first gram by position. A title
+        # first containing that gram at p can only contain the query at p or later, so
+        # once k matches sit at or before p nothing further on can beat them
+        titles = self.titles
+        exact = len(query) <= GRAM_SIZE
+        buckets = self.grams.get(query[:GRAM_SIZE], {})
+        best: List[Tuple[int, str, int]] = []
+        for position in sorted(buckets):
+            if len(best) >= needed and position > best[-1][0]:
+                break
+            found = []
+            at_position = 0
+            for ordinal in buckets[position]:
+                match = position if exact else titles[ordinal].find(query, position)
+                if match <= 0:
+                    continue
+                found.append((match, titles[ordinal], ordinal))
+                if match == position:
+                    # Buckets are in title order: the rest of this one cannot beat these
+                    at_position += 1
+                    if at_position >= needed:
+                        break
+            if found:
+                best = heapq.nsmallest(needed, best + found)
+        results.extend(ordinal for _, _, ordinal in best)
+        needed -= len(best)
+        if needed <= 0 or not fuzzy:
+            return results
+
+        # Fuzzy tier: the last word may still be half typed, so it matches word prefixes
+        seen = set(results)
+        near = heapq.nsmallest(needed, (
+            (distance, titles[ordinal], ordinal)
+            for ordinal, distance in self.fuzzy.match(query, prefix=True).items()
+            if ordinal not in seen
+        ))
+        results.extend(ordinal for _, _, ordinal in near)
+        return results
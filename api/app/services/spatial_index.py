@@ -0,0 +1,298 @@
+import math
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+BBox = Tuple[float, float, float, float]
+
+# Web Mercator stops short of the poles
+MAX_LATITUDE = 85.0511287798066
+
+# Entries per tree node; 16 is a good balance between depth and scan cost
+NODE_SIZE = 16
+# Hilbert curve resolution (16 bits per axis)
+HILBERT_MAX = (1 << 16) - 1
+
+
+def _hilbert(x: int, y: int) -> int:
+    """Hilbert curve index of a 16-bit grid cell (port of flatbush's hilbert())"""
+    a = x ^ y
+    b = 0xFFFF ^ a
+    c = 0xFFFF ^ (x | y)
+    d = x & (y ^ 0xFFFF)
+
+    A = a | (b >> 1)
+    B = (a >> 1) ^ a
+    C = ((c >> 1) ^ (b & (d >> 1))) ^ c
+    D = ((a & (c >> 1)) ^ (d >> 1)) ^ d
+
+    a, b, c, d = A, B, C, D
+    A = (a & (a >> 2)) ^ (b & (b >> 2))
+    B = (a & (b >> 2)) ^ (b & ((a ^ b) >> 2))
+    C ^= (a & (c >> 2)) ^ (b & (d >> 2))
+    D ^= (b & (c >> 2)) ^ ((a ^ b) & (d >> 2))
+
+    a, b, c, d = A, B, C, D
+    A = (a & (a >> 4)) ^ (b & (b >> 4))
+    B = (a & (b >> 4)) ^ (b & ((a ^ b) >> 4))
+    C ^= (a & (c >> 4)) ^ (b & (d >> 4))
+    D ^= (b & (c >> 4)) ^ ((a ^ b) & (d >> 4))
+
+    a, b, c, d = A, B, C, D
+    C ^= (a & (c >> 8)) ^ (b & (d >> 8))
+    D ^= (b & (c >> 8)) ^ ((a ^ b) & (d >> 8))
+
+    a = C ^ (C >> 1)
+    b = D ^ (D >> 1)
+
+    i0 = x ^ y
+    i1 = b | (0xFFFF ^ (i0 | a))
+
+    i0 = (i0 | (i0 << 8)) & 0x00FF00FF
+    i0 = (i0 | (i0 << 4)) & 0x0F0F0F0F
+    i0 = (i0 | (i0 << 2)) & 0x33333333
+    i0 = (i0 | (i0 << 1)) & 0x55555555
+
+    i1 = (i1 | (i1 << 8)) & 0x00FF00FF
+    i1 = (i1 | (i1 << 4)) & 0x0F0F0F0F
+    i1 = (i1 | (i1 << 2)) & 0x33333333
+    i1 = (i1 | (i1 << 1)) & 0x55555555
+
+    return (i1 << 1) | i0
+
+
+class PackedRTree:
+    """Static Hilbert-packed R-tree over bounding boxes (same layout as flatbush)"""
+
+    def __init__(self, boxes: List[BBox], ids: List[int], node_size: int = NODE_SIZE):
+        self.node_size = node_size
+        self.num_items = len(boxes)
+        self._boxes: List[BBox] = []
+        self._indices: List[int] = []
+        self._level_bounds: List[int] = []
+        if boxes:
+            self._build(boxes, ids)
+
+    def _build(self, boxes: List[BBox], ids: List[int]):
+        min_x = min(box[0] for box in boxes)
+        min_y = min(box[1] for box in boxes)
+        max_x = max(box[2] for box in boxes)
+        max_y = max(box[3] for box in boxes)
+        width = (max_x - min_x) or 1.0
+        height = (max_y - min_y) or 1.0
+
+        # Sort items along the Hilbert curve so neighbours end up in the same node
+        def hilbert_key(i: int) -> int:
+            box = boxes[i]
+            hx = int(HILBERT_MAX * ((box[0] + box[2]) / 2 - min_x) / width)
+            hy = int(HILBERT_MAX * ((box[1] + box[3]) / 2 - min_y) / height)
+            return _hilbert(hx, hy)
+
+        order = sorted(range(len(boxes)), key=hilbert_key)
+        self._boxes = [boxes[i] for i in order]
+        self._indices = [ids[i] for i in order]
+        self._level_bounds = [len(order)]
+
+        # Pack each level into parent nodes until a single root remains
+        start, end = 0, len(order)
+        while True:
+            for pos in range(start, end, self.node_size):
+                chunk = self._boxes[pos:min(pos + self.node_size, end)]
+                self._boxes.append((
+                    min(box[0] for box in chunk),
+                    min(box[1] for box in chunk),
+                    max(box[2] for box in chunk),
+                    max(box[3] for box in chunk),
+                ))
+                self._indices.append(pos)
+            start, end = end, len(self._boxes)
+            self._level_bounds.append(end)
+            if end - start == 1:
+                break
+
+    def search(self, min_x: float, min_y: float, max_x: float, max_y: float) -> List[int]:
+        """Ids of all items whose box intersects the query box, in ascending id order"""
+        if not self.num_items:
+            return []
+
+        results = []
+        boxes = self._boxes
+        indices = self._indices
+        stack = [len(boxes) - 1]
+        while stack:
+            node = stack.pop()
+            start = indices[node]
+            level_end = self._level_bounds[bisect_right(self._level_bounds, start)]
+            for pos in range(start, min(start + self.node_size, level_end)):
+                box = boxes[pos]
+                if box[2] < min_x or box[3] < min_y or box[0] > max_x or box[1] > max_y:
+                    continue
+                if pos < self.num_items:
+                    results.append(indices[pos])
+                else:
+                    stack.append(pos)
+
+        results.sort()
+        return results
+
+
+def _walk_coordinates(coordinates: Any, bounds: List[float]):
+    # Positions are [lng, lat(, alt)] (numbers or numeric strings); anything else nests
+    if coordinates and not isinstance(coordinates[0], (list, tuple)):
+        x, y = float(coordinates[0]), float(coordinates[1])
+        if x < bounds[0]:
+            bounds[0] = x
+        if y < bounds[1]:
+            bounds[1] = y
+        if x > bounds[2]:
+            bounds[2] = x
+        if y > bounds[3]:
+            bounds[3] = y
+        return
+    for child in coordinates:
+        _walk_coordinates(child, bounds)
+
+
+def geometry_bbox(geometry: Optional[Dict[str, Any]]) -> Optional[BBox]:
+    """Bounding box of any GeoJSON geometry, or None if it has no coordinates"""
+    if not isinstance(geometry, dict):
+        return None
+
+    bounds = [float("inf"), float("inf"), float("-inf"), float("-inf")]
+    try:
+        if geometry.get("type") == "GeometryCollection":
+            for child in geometry.get("geometries", []):
+                child_box = geometry_bbox(child)
+                if child_box is not None:
+                    _walk_coordinates([child_box[:2], child_box[2:]], bounds)
+        else:
+            _walk_coordinates(geometry.get("coordinates") or [], bounds)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+    if bounds[0] == float("inf"):
+        return None
+    return (bounds[0], bounds[1], bounds[2], bounds[3])
+
+
+def point_position(feature: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """(lng, lat) of a Point feature as floats, or None for anything else"""
+    geometry = feature.get("geometry") if isinstance(feature, dict) else None
+    if not isinstance(geometry, dict) or geometry.get("type") != "Point":
+        return None
+    try:
+        coordinates = geometry["coordinates"]
+        lng, lat = float(coordinates[0]), float(coordinates[1])
+    except (KeyError, TypeError, ValueError, IndexError):
+        return None
+    if math.isnan(lng) or math.isnan(lat):
+        return None
+    return lng, lat
+
+
+def project_mercator(lng: float, lat: float) -> Tuple[float, float]:
+    """Web Mercator projection to world coordinates in [0, 1]"""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    sin = math.sin(math.radians(lat))
+    x = lng / 360.0 + 0.5
+    y = 0.5 - 0.25 * math.log((1 + sin) / (1 - sin)) / math.pi
+    return x, y
+
+
+def unproject_mercator(x: float, y: float) -> Tuple[float, float]:
+    """Inverse of project_mercator"""
+    lng = (x - 0.5) * 360.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return lng, lat
+
+
+# Mean Earth radius (IUGG), and the farthest two points on it can be apart
+EARTH_RADIUS_M = 6371008.8
+MAX_DISTANCE_M = math.pi * EARTH_RADIUS_M
+
+
+def haversine_m(lng1: float, lat1: float, lng2: float, lat2: float) -> float:
+    """Great-circle distance in meters"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(lng: float, lat: float, radius_m: float) -> BBox:
+    """Smallest lng/lat box holding every point within radius_m; wraps like FeatureIndex.query expects"""
+    angle = radius_m / EARTH_RADIUS_M
+    dlat = math.degrees(angle)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90.0 or max_lat >= 90.0 or angle >= math.pi / 2:
+        # The circle reaches a pole: every longitude is in range
+        return (-180.0, max(-90.0, min_lat), 180.0, min(90.0, max_lat))
+
+    ratio = math.sin(angle) / math.cos(math.radians(lat))
+    if ratio >= 1.0:
+        return (-180.0, min_lat, 180.0, max_lat)
+    dlng = math.degrees(math.asin(ratio))
+    min_lng, max_lng = lng - dlng, lng + dlng
+    if min_lng < -180.0:
+        min_lng += 360.0
+    if max_lng > 180.0:
+        max_lng -= 360.0
+    return (min_lng, min_lat, max_lng, max_lat)
+
+
+class FeatureIndex:
+    """Spatial index over the features of one FeatureCollection"""
+
+    def __init__(self, features: List[Dict[str, Any]]):
+        self.features = features
+        boxes: List[BBox] = []
+        ids: List[int] = []
+        for ordinal, feature in enumerate(features):
+            box = geometry_bbox(feature.get("geometry")) if isinstance(feature, dict) else None
+            if box is not None:
+                boxes.append(box)
+                ids.append(ordinal)
+        self.tree = PackedRTree(boxes, ids)
+
+    def query(self, bbox: BBox, limit: Optional[int] = None) -> List[int]:
+        """Feature ordinals intersecting bbox, in file order; handles antimeridian-crossing boxes"""
+        min_lng, min_lat, max_lng, max_lat = bbox
+        if min_lng <= max_lng:
+            ordinals = self.tree.search(min_lng, min_lat, max_lng, max_lat)
+        else:
+            # minLng > maxLng means the viewport wraps across 180°
+            ordinals = sorted(set(
+                self.tree.search(min_lng, min_lat, 180.0, max_lat)
+                + self.tree.search(-180.0, min_lat, max_lng, max_lat)
+            ))
+        if limit is not None:
+            ordinals = ordinals[:limit]
+        return ordinals
+
+
+def parse_bbox(value: str) -> BBox:
+    """Parse 'minLng,minLat,maxLng,maxLat' into floats, raising ValueError when invalid"""
+    parts = value.split(",")
+    if len(parts) != 4:
+        raise ValueError("bbox must be minLng,minLat,maxLng,maxLat")
+    min_lng, min_lat, max_lng, max_lat = (float(part) for part in parts)
+    if not all(-180.0 <= lng <= 180.0 for lng in (min_lng, max_lng)):
+        raise ValueError("bbox longitudes must be within [-180, 180]")
+    if not all(-90.0 <= lat <= 90.0 for lat in (min_lat, max_lat)):
+        raise ValueError("bbox latitudes must be within [-90, 90]")
+    if min_lat > max_lat:
+        raise ValueError("bbox minLat must not exceed maxLat")
+    return (min_lng, min_lat, max_lng, max_lat)
+
+
+def parse_latlng(value: str) -> Tuple[float, float]:
+    """Parse 'lat,lng' into (lng, lat) floats, raising ValueError when invalid"""
+    parts = value.split(",")
+    if len(parts) != 2:
+        raise ValueError("must be lat,lng")
+    lat, lng = (float(part) for part in parts)
+    if not -90.0 <= lat <= 90.0:
+        raise ValueError("latitude must be within [-90, 90]")
+    if not -180.0 <= lng <= 180.0:
+        raise ValueError("longitude must be within [-180, 180]")
+    return (lng, lat)
@@ -0,0 +1,99 @@
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.services.text_normalize import strip_accents
+
+STORES_PATH = Path(__file__).resolve().parent.parent.parent / "assets" / "stores"
+
+# details.json reads are I/O bound, so a few threads overlap them
+DETAILS_WORKERS = 8
+
+_PUNCTUATION = re.compile(r"[^\w\s-]", re.ASCII)
+_SPACES = re.compile(r"\s+")
+
+# path -> ((mtime_ns, size), parsed details), so a reload only parses files that changed
+_parsed: Dict[Path, Tuple[Tuple[int, int], Optional[Dict[str, Any]]]] = {}
+_parsed_lock = threading.Lock()
+
+
+def store_slug(title: str) -> str:
+    """Directory name of a store, same rule as the frontend's details URL"""
+    slug = strip_accents(title.replace("&", "and")).lower()
+    return _SPACES.sub("-", _PUNCTUATION.sub("", slug))
+
+
+def details_paths(base_path: Path = STORES_PATH) -> Dict[str, Path]:
+    """country/type/slug (lowercased) -> details.json; some directories keep capitals"""
+    if not base_path.exists():
+        return {}
+    return {
+        path.parent.relative_to(base_path).as_posix().lower(): path
+        for path in base_path.glob("*/*/*/details.json")
+    }
+
+
+def details_key(feature: Dict[str, Any]) -> Optional[str]:
+    """Lookup key of a feature in details_paths(), from its id prefix, type and title"""
+    properties = feature.get("properties", {})
+    store_id, store_type, title = properties.get("id"), properties.get("type"), properties.get("title")
+    if not (isinstance(store_id, str) and "_" in store_id and store_type and title):
+        return None
+    return f"{store_id.split('_', 1)[0]}/{store_type}/{store_slug(title)}".lower()
+
+
+def read_details(path: Path) -> Optional[Dict[str, Any]]:
+    """Parsed details.json, reused while the file is unchanged; None if unreadable"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _parsed.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    details = None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            details = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[store_details] Skipping {path}: {e}")
+    if not isinstance(details, dict):
+        details = None
+    with _parsed_lock:
+        _parsed[path] = (stamp, details)
+    return details
+
+
+def iter_store_details(features: List[Dict], base_path: Path = STORES_PATH) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(ordinal, details) for every feature with a details.json, in feature order
+
+    Files are read by a thread pool, so callers can index each store while later ones load.
+    """
+    paths = details_paths(base_path)
+    jobs = []
+    for ordinal, feature in enumerate(features):
+        key = details_key(feature)
+        path = paths.get(key) if key is not None else None
+        if path is not None:
+            jobs.append((ordinal, path))
+    if not jobs:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(DETAILS_WORKERS, len(jobs))) as pool:
+        for (ordinal, _), details in zip(jobs, pool.map(read_details, (path for _, path in jobs))):
+            if details is not None:
+                yield ordinal, details
+
+
+def load_store_details(features: List[Dict], base_path: Path = STORES_PATH) -> List[Optional[Dict[str, Any]]]:
+    """details.json per feature, None where a store has none"""
+    details: List[Optional[Dict[str, Any]]] = [None] * len(features)
+    for ordinal, store_details in iter_store_details(features, base_path):
+        details[ordinal] = store_details
+    return details
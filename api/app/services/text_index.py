@@ -0,0 +1,128 @@
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.text_normalize import is_cjk, tokenize
+
+# BM25 parameters: term-frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+
+# BM25F field weights: what a store sells says more than where it is
+FIELD_BOOSTS = {
+    "product": 3.0,
+    "product_description": 1.5,
+    "description": 1.0,
+    "address": 0.5,
+}
+
+PRODUCT_SLOTS = ("product1", "product2", "product3", "product4", "product5")
+
+
+def _text(value: Any) -> str:
+    return value if isinstance(value, str) else ""
+
+
+def detail_fields(details: Dict[str, Any]) -> Dict[str, str]:
+    """Searchable text of a details.json, one string per FIELD_BOOSTS field"""
+    products = [details.get(slot) for slot in PRODUCT_SLOTS]
+    products = [product for product in products if isinstance(product, dict)]
+    return {
+        "product": " ".join(_text(product.get("name")) for product in products),
+        "product_description": " ".join(_text(product.get("description")) for product in products),
+        "description": _text(details.get("description")),
+        "address": _text(details.get("address")),
+    }
+
+
+class FullTextIndex:
+    """BM25F over store detail fields
+
+    Stores are added one at a time while their files load; finish() turns the
+    collected term counts into per-term impact postings, so a query only sums
+    precomputed scores.
+    """
+
+    def __init__(self, boosts: Optional[Dict[str, float]] = None, k1: float = K1, b: float = B):
+        self.boosts = boosts or FIELD_BOOSTS
+        self.k1 = k1
+        self.b = b
+        # term -> (ordinal, field, count), until finish()
+        self._counts: Dict[str, List[Tuple[int, str, int]]] = {}
+        # ordinal -> field -> token count
+        self._lengths: Dict[int, Dict[str, int]] = {}
+        # term -> (ordinal, impact) by ordinal, after finish()
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        # CJK character -> the bigram terms containing it, for one-character queries
+        self.cjk_terms: Dict[str, List[str]] = {}
+        self.size = 0
+
+    def add(self, ordinal: int, fields: Dict[str, str]):
+        lengths: Dict[str, int] = {}
+        for field, text in fields.items():
+            if field not in self.boosts:
+                continue
+            tokens = tokenize(text)
+            lengths[field] = len(tokens)
+            for token, count in Counter(tokens).items():
+                self._counts.setdefault(token, []).append((ordinal, field, count))
+        if any(lengths.values()):
+            self._lengths[ordinal] = lengths
+
+    def finish(self) -> "FullTextIndex":
+        self.size = len(self._lengths)
+        if not self.size:
+            self._counts.clear()
+            return self
+
+        averages = {
+            field: (sum(lengths.get(field, 0) for lengths in self._lengths.values()) / self.size) or 1.0
+            for field in self.boosts
+        }
+        # Boost over length normalization, per store and field
+        weights = {
+            ordinal: {
+                field: self.boosts[field] / (1 - self.b + self.b * length / averages[field])
+                for field, length in lengths.items()
+            }
+            for ordinal, lengths in self._lengths.items()
+        }
+        for term, entries in self._counts.items():
+            # Boosted, length-normalized frequency summed over fields, then saturated once
+            frequencies: Dict[int, float] = {}
+            for ordinal, field, count in entries:
+                frequencies[ordinal] = frequencies.get(ordinal, 0.0) + count * weights[ordinal][field]
+            idf = math.log(1 + (self.size - len(frequencies) + 0.5) / (len(frequencies) + 0.5))
+            scale = idf * (self.k1 + 1)
+            self.postings[term] = sorted(
+                (ordinal, scale * frequency / (frequency + self.k1))
+                for ordinal, frequency in frequencies.items()
+            )
+
+        for term in self.postings:
+            if len(term) == 2 and is_cjk(term):
+                for char in set(term):
+                    self.cjk_terms.setdefault(char, []).append(term)
+
+        self._counts.clear()
+        self._lengths.clear()
+        return self
+
+    def score(self, query: str) -> Dict[int, float]:
+        """ordinal -> BM25F score for stores containing any query word"""
+        scores: Dict[int, float] = {}
+        # A repeated query word counts once
+        for term in dict.fromkeys(tokenize(query)):
+            if term in self.postings:
+                for ordinal, impact in self.postings[term]:
+                    scores[ordinal] = scores.get(ordinal, 0.0) + impact
+                continue
+            # CJK text is indexed as bigrams: a lone character counts by its best bigram
+            best: Dict[int, float] = {}
+            for bigram in self.cjk_terms.get(term, ()):
+                for ordinal, impact in self.postings[bigram]:
+                    if impact > best.get(ordinal, 0.0):
+                        best[ordinal] = impact
+            for ordinal, impact in best.items():
+                scores[ordinal] = scores.get(ordinal, 0.0) + impact
+        return scores
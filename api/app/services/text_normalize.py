@@ -0,0 +1,51 @@
+import re
+import unicodedata
+from typing import List
+
+# Latin/Greek/Cyrillic accents only: kana voicing marks (U+3099/U+309A) change the
+# character, so が must not fold to か
+_ACCENTS = re.compile("[\u0300-\u036f]")
+
+_WORD = re.compile(r"\w+")
+# Scripts written without spaces: Han, kana and Hangul
+_CJK_CHARS = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_CJK_RUN = re.compile(f"[{_CJK_CHARS}]+|[^{_CJK_CHARS}]+")
+_CJK = re.compile(f"[{_CJK_CHARS}]")
+
+
+def strip_accents(text: str) -> str:
+    """text without Latin/Greek/Cyrillic accents: "Café" -> "Cafe", kana untouched"""
+    return unicodedata.normalize("NFC", _ACCENTS.sub("", unicodedata.normalize("NFD", text)))
+
+
+def normalize(text: str) -> str:
+    """Search form of a string: NFKC (full/half width folded), case-folded, Latin accents removed
+
+    "Ｐàng" and "pang" normalize alike, as do half-width ｶﾞ and ガ.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    if text.isascii():
+        return text
+    return strip_accents(text)
+
+
+def is_cjk(text: str) -> bool:
+    return bool(_CJK.match(text))
+
+
+def tokenize(text: str) -> List[str]:
+    """Normalized words; runs of CJK characters become overlapping character bigrams
+
+    "紅燒牛肉麵 noodles" -> 紅燒, 燒牛, 牛肉, 肉麵, noodles. A lone CJK character stays as is.
+    """
+    tokens: List[str] = []
+    for word in _WORD.findall(normalize(text)):
+        if word.isascii():
+            tokens.append(word)
+            continue
+        for run in _CJK_RUN.findall(word):
+            if len(run) > 1 and is_cjk(run):
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            else:
+                tokens.append(run)
+    return tokens
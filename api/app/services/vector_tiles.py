@@ -0,0 +1,429 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import shutil
+import struct
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from app.services.map_cache import MapAsset, map_cache
+from app.services.spatial_index import project_mercator
+from app.utils.http_cache import EncodedBody
+
+# Layer name -> source file; every layer is cut into the same tile pyramid
+TILE_SOURCES = {
+    "meta": "meta.json",
+    "stores": "stores.json",
+    "districts": "districts.json",
+}
+
+# Mapbox Vector Tile geometry parameters
+EXTENT = 4096
+BUFFER = 64
+MAX_ZOOM = 22
+
+# Generated tiles are kept on disk per data version, and the hottest ones in memory
+TILE_CACHE_PATH = Path(__file__).resolve().parent.parent.parent / "cache" / "tiles"
+MEMORY_TILES = 2048
+
+MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+Point = Tuple[float, float]
+
+
+# ─── Protobuf encoding (vector_tile.proto v2) ───────────────
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number: int, wire_type: int) -> bytes:
+    return _varint((number << 3) | wire_type)
+
+
+def _bytes_field(number: int, payload: bytes) -> bytes:
+    return _field(number, 2) + _varint(len(payload)) + payload
+
+
+def _packed_field(number: int, values: List[int]) -> bytes:
+    return _bytes_field(number, b"".join(_varint(value) for value in values))
+
+
+def _encode_value(value: Any) -> bytes:
+    # Tile values are scalars; nested JSON is flattened to a string
+    if isinstance(value, bool):
+        return _field(7, 0) + _varint(int(value))
+    if isinstance(value, int) and -(1 << 63) <= value < (1 << 63):
+        return _field(6, 0) + _varint(_zigzag(value))
+    if isinstance(value, float):
+        return _field(3, 1) + struct.pack("<d", value)
+    if not isinstance(value, str):
+        value = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return _bytes_field(1, value.encode("utf-8"))
+
+
+def _command(command_id: int, count: int) -> int:
+    return (command_id & 0x7) | (count << 3)
+
+
+class _LayerEncoder:
+    """Accumulate features for one tile layer with shared key/value tables"""
+
+    GEOM_POINT = 1
+    GEOM_LINESTRING = 2
+    GEOM_POLYGON = 3
+
+    def __init__(self, name: str):
+        self.name = name
+        self.keys: Dict[str, int] = {}
+        self.values: Dict[Tuple[type, Any], int] = {}
+        self.encoded_values: List[bytes] = []
+        self.features: List[bytes] = []
+
+    def _tags(self, properties: Dict[str, Any]) -> List[int]:
+        tags: List[int] = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            key_index = self.keys.setdefault(key, len(self.keys))
+            hashable = value if isinstance(value, (str, int, float, bool)) else json.dumps(value, sort_keys=True)
+            value_key = (type(value), hashable)
+            value_index = self.values.get(value_key)
+            if value_index is None:
+                value_index = len(self.encoded_values)
+                self.values[value_key] = value_index
+                self.encoded_values.append(_encode_value(value))
+            tags.extend((key_index, value_index))
+        return tags
+
+    def add(self, geom_type: int, geometry: List[int], properties: Dict[str, Any]):
+        payload = _packed_field(2, self._tags(properties))
+        payload += _field(3, 0) + _varint(geom_type)
+        payload += _packed_field(4, geometry)
+        self.features.append(payload)
+
+    def encode(self) -> bytes:
+        payload = _field(15, 0) + _varint(2)
+        payload += _bytes_field(1, self.name.encode("utf-8"))
+        for feature in self.features:
+            payload += _bytes_field(2, feature)
+        for key in self.keys:
+            payload += _bytes_field(3, key.encode("utf-8"))
+        for value in self.encoded_values:
+            payload += _bytes_field(4, value)
+        payload += _field(5, 0) + _varint(EXTENT)
+        return payload
+
+
+# ─── Geometry ───────────────────────────────
+def _tile_lng(x: float, z: int) -> float:
+    return x / (1 << z) * 360.0 - 180.0
+
+
+def _tile_lat(y: float, z: int) -> float:
+    n = math.pi - 2.0 * math.pi * y / (1 << z)
+    return math.degrees(math.atan(math.sinh(n)))
+
+
+def tile_bbox(z: int, x: int, y: int, buffer: float = 0.0) -> Tuple[float, float, float, float]:
+    """(minLng, minLat, maxLng, maxLat) of a tile, grown by buffer in tile units"""
+    return (
+        max(-180.0, _tile_lng(x - buffer, z)),
+        max(-90.0, _tile_lat(y + 1 + buffer, z)),
+        min(180.0, _tile_lng(x + 1 + buffer, z)),
+        min(90.0, _tile_lat(y - buffer, z)),
+    )
+
+
+def _clip_ring(ring: List[Point], low: float, high: float) -> List[Point]:
+    """Sutherland–Hodgman clip of a closed ring against the square [low, high]²"""
+    edges = (
+        (lambda p: p[0] >= low, lambda a, b: (low, a[1] + (b[1] - a[1]) * (low - a[0]) / (b[0] - a[0]))),
+        (lambda p: p[0] <= high, lambda a, b: (high, a[1] + (b[1] - a[1]) * (high - a[0]) / (b[0] - a[0]))),
+        (lambda p: p[1] >= low, lambda a, b: (a[0] + (b[0] - a[0]) * (low - a[1]) / (b[1] - a[1]), low)),
+        (lambda p: p[1] <= high, lambda a, b: (a[0] + (b[0] - a[0]) * (high - a[1]) / (b[1] - a[1]), high)),
+    )
+    output = ring
+    for inside, intersect in edges:
+        if not output:
+            break
+        points, output = output, []
+        previous = points[-1]
+        for current in points:
+            if inside(current):
+                if not inside(previous):
+                    output.append(intersect(previous, current))
+                output.append(current)
+            elif inside(previous):
+                output.append(intersect(previous, current))
+            previous = current
+    return output
+
+
+def _ring_area(ring: List[Tuple[int, int]]) -> int:
+    # Surveyor's formula in tile coordinates (y down); positive means clockwise on screen
+    area = 0
+    for i in range(len(ring)):
+        x1, y1 = ring[i]
+        x2, y2 = ring[(i + 1) % len(ring)]
+        area += x1 * y2 - x2 * y1
+    return area
+
+
+def _dedupe(points: List[Point]) -> List[Tuple[int, int]]:
+    out: List[Tuple[int, int]] = []
+    for px, py in points:
+        point = (int(round(px)), int(round(py)))
+        if not out or out[-1] != point:
+            out.append(point)
+    return out
+
+
+class _TileProjector:
+    """Map lng/lat positions into the integer coordinate space of one tile"""
+
+    def __init__(self, z: int, x: int, y: int):
+        self.scale = 1 << z
+        self.x = x
+        self.y = y
+
+    def __call__(self, position: List[Any]) -> Point:
+        wx, wy = project_mercator(float(position[0]), float(position[1]))
+        return ((wx * self.scale - self.x) * EXTENT, (wy * self.scale - self.y) * EXTENT)
+
+
+def _encode_points(points: List[Tuple[int, int]]) -> List[int]:
+    geometry = [_command(1, len(points))]
+    cx = cy = 0
+    for px, py in points:
+        geometry.extend((_zigzag(px - cx), _zigzag(py - cy)))
+        cx, cy = px, py
+    return geometry
+
+
+def _encode_paths(paths: List[List[Tuple[int, int]]], close: bool) -> List[int]:
+    geometry: List[int] = []
+    cx = cy = 0
+    for path in paths:
+        geometry.extend((_command(1, 1), _zigzag(path[0][0] - cx), _zigzag(path[0][1] - cy)))
+        cx, cy = path[0]
+        geometry.append(_command(2, len(path) - 1))
+        for px, py in path[1:]:
+            geometry.extend((_zigzag(px - cx), _zigzag(py - cy)))
+            cx, cy = px, py
+        if close:
+            geometry.append(_command(7, 1))
+    return geometry
+
+
+def _polygon_rings(polygon: List[List[Any]], project: _TileProjector) -> List[List[Tuple[int, int]]]:
+    rings: List[List[Tuple[int, int]]] = []
+    for ring_index, ring in enumerate(polygon):
+        clipped = _clip_ring([project(position) for position in ring], -BUFFER, EXTENT + BUFFER)
+        points = _dedupe(clipped)
+        if len(points) > 1 and points[0] == points[-1]:
+            points.pop()
+        if len(points) < 3:
+            if ring_index == 0:
+                # Exterior ring is gone, so are its holes
+                return rings
+            continue
+        # MVT wants clockwise exterior rings and counter-clockwise holes
+        area = _ring_area(points)
+        if area == 0:
+            continue
+        if (ring_index == 0) != (area > 0):
+            points.reverse()
+        rings.append(points)
+    return rings
+
+
+def _encode_geometry(geometry: Dict[str, Any], project: _TileProjector) -> Optional[Tuple[int, List[int]]]:
+    """Encode one GeoJSON geometry for a tile, or None if nothing of it lands there"""
+    geom_type = geometry.get("type")
+    coordinates = geometry.get("coordinates") or []
+    low, high = -BUFFER, EXTENT + BUFFER
+
+    if geom_type in ("Point", "MultiPoint"):
+        positions = [coordinates] if geom_type == "Point" else coordinates
+        points = []
+        for position in positions:
+            px, py = project(position)
+            if low <= px <= high and low <= py <= high:
+                points.append((int(round(px)), int(round(py))))
+        return (_LayerEncoder.GEOM_POINT, _encode_points(points)) if points else None
+
+    if geom_type in ("LineString", "MultiLineString"):
+        # Lines are not clipped; renderers drop whatever falls outside the extent
+        lines = [coordinates] if geom_type == "LineString" else coordinates
+        paths = [path for path in (_dedupe([project(p) for p in line]) for line in lines) if len(path) > 1]
+        return (_LayerEncoder.GEOM_LINESTRING, _encode_paths(paths, close=False)) if paths else None
+
+    if geom_type in ("Polygon", "MultiPolygon"):
+        polygons = [coordinates] if geom_type == "Polygon" else coordinates
+        rings: List[List[Tuple[int, int]]] = []
+        for polygon in polygons:
+            rings.extend(_polygon_rings(polygon, project))
+        return (_LayerEncoder.GEOM_POLYGON, _encode_paths(rings, close=True)) if rings else None
+
+    return None
+
+
+def render_tile(assets: Dict[str, MapAsset], z: int, x: int, y: int) -> bytes:
+    """Cut every source layer into one encoded vector tile"""
+    query_box = tile_bbox(z, x, y, buffer=BUFFER / EXTENT)
+    project = _TileProjector(z, x, y)
+
+    payload = b""
+    for layer_name, asset in assets.items():
+        layer = _LayerEncoder(layer_name)
+        features = asset.features
+        for ordinal in asset.spatial_index.query(query_box):
+            feature = features[ordinal]
+            try:
+                encoded = _encode_geometry(feature.get("geometry") or {}, project)
+            except (TypeError, ValueError, IndexError, ZeroDivisionError):
+                continue
+            if encoded is not None:
+                layer.add(encoded[0], encoded[1], feature.get("properties") or {})
+        if layer.features:
+            payload += _bytes_field(3, layer.encode())
+    return payload
+
+
+# ─── Tile cache ──────────────────────────────
+class TileCache:
+    """Lazily generated vector tiles, cached in memory and on disk per data version"""
+
+    def __init__(self, cache_path: Path = TILE_CACHE_PATH, memory_tiles: int = MEMORY_TILES):
+        self.cache_path = cache_path
+        self.memory_tiles = memory_tiles
+        self._memory: "OrderedDict[Tuple[str, int, int, int], EncodedBody]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, int, int, int], asyncio.Future] = {}
+        self._version: Optional[str] = None
+        # Deletion of the previous versions' tile directories, off the event loop
+        self._cleanup: Optional[asyncio.Task] = None
+
+    async def _sources(self) -> Tuple[str, Dict[str, MapAsset], float]:
+        """Current source assets, their combined data version and newest mtime"""
+        assets: Dict[str, MapAsset] = {}
+        skipped: Dict[str, str] = {}
+        for layer_name, filename in TILE_SOURCES.items():
+            try:
+                assets[layer_name] = await map_cache.get(filename)
+            except HTTPException as e:
+                # A missing or broken source only drops its own layer
+                skipped[layer_name] = str(e.detail)
+
+        digest = hashlib.blake2b(digest_size=8)
+        for layer_name, asset in assets.items():
+            digest.update(f"{layer_name}:{asset.etag};".encode("utf-8"))
+        version = digest.hexdigest()
+        if version != self._version:
+            for layer_name, detail in skipped.items():
+                print(f"[tiles] Skipping layer {layer_name}: {detail}")
+
+        last_modified = max((asset.last_modified for asset in assets.values()), default=0.0)
+        return version, assets, last_modified
+
+    async def refresh(self):
+        """Re-derive the data version now, e.g. right after a source file was saved"""
+        version, _, _ = await self._sources()
+        self._switch_version(version)
+
+    def _switch_version(self, version: str):
+        """Forget tiles of every other data version: memory now, disk in a worker thread"""
+        if self._version == version:
+            return
+        print(f"[tiles] Data version {version}")
+        self._memory.clear()
+        self._version = version
+        # A large tile tree takes a while to delete, so requests don't wait for it
+        self._cleanup = asyncio.ensure_future(asyncio.to_thread(self._remove_stale))
+
+    def _remove_stale(self):
+        """Delete tile directories of every version but the current one (runs in a worker thread)"""
+        if not self.cache_path.exists():
+            return
+        for entry in self.cache_path.iterdir():
+            # Re-read per entry: the version may switch again while this runs
+            if entry.name != self._version:
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def _tile_path(self, version: str, z: int, x: int, y: int) -> Path:
+        return self.cache_path / version / str(z) / str(x) / f"{y}.mvt"
+
+    def _load_or_render(self, version: str, assets: Dict[str, MapAsset], z: int, x: int, y: int) -> EncodedBody:
+        """Read a tile from disk or render and persist it (runs in a worker thread)"""
+        path = self._tile_path(version, z, x, y)
+        try:
+            return EncodedBody(path.read_bytes())
+        except FileNotFoundError:
+            pass
+
+        data = render_tile(assets, z, x, y)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so readers never see a partial tile
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[tiles] Failed to persist tile {z}/{x}/{y}: {str(e)}")
+        return EncodedBody(data)
+
+    async def get(self, z: int, x: int, y: int) -> Tuple[EncodedBody, float]:
+        """Encoded tile and its Last-Modified time"""
+        if not 0 <= z <= MAX_ZOOM or not 0 <= x < (1 << z) or not 0 <= y < (1 << z):
+            raise HTTPException(status_code=404, detail="Tile out of range.")
+
+        version, assets, last_modified = await self._sources()
+        self._switch_version(version)
+
+        key = (version, z, x, y)
+        tile = self._memory.get(key)
+        if tile is not None:
+            self._memory.move_to_end(key)
+            return tile, last_modified
+
+        # Concurrent requests for the same cold tile share one render
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(asyncio.to_thread(self._load_or_render, version, assets, z, x, y))
+            self._inflight[key] = future
+            try:
+                tile = await future
+            finally:
+                self._inflight.pop(key, None)
+            if self._version == version:
+                self._memory[key] = tile
+                if len(self._memory) > self.memory_tiles:
+                    self._memory.popitem(last=False)
+        else:
+            tile = await future
+        return tile, last_modified
+
+    def invalidate(self):
+        """Drop every cached tile (the next request re-checks the data version)"""
+        self._memory.clear()
+        self._version = None
+        shutil.rmtree(self.cache_path, ignore_errors=True)
+
+
+# Global singleton instance
+tile_cache = TileCache()
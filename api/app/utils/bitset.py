@@ -0,0 +1,48 @@
+import re
+from typing import Iterable, Iterator
+
+# Bitsets are plain ints: bit i set <=> ordinal i is in the set
+
+_NONZERO = re.compile(rb"[^\x00]")
+
+
+def from_ordinals(ordinals: Iterable[int]) -> int:
+    """Bitset with the given ordinals set"""
+    ordinals = list(ordinals)
+    if not ordinals:
+        return 0
+    # Setting bits in a bytearray avoids rebuilding a big int once per ordinal
+    data = bytearray(max(ordinals) // 8 + 1)
+    for ordinal in ordinals:
+        data[ordinal >> 3] |= 1 << (ordinal & 7)
+    return int.from_bytes(data, "little")
+
+
+def full(size: int) -> int:
+    """Bitset of ordinals 0..size-1"""
+    return (1 << size) - 1
+
+
+def iter_ordinals(mask: int) -> Iterator[int]:
+    """Set ordinals in ascending order; runs of empty bytes are skipped in C"""
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    for match in _NONZERO.finditer(data):
+        base = match.start() * 8
+        byte = data[match.start()]
+        while byte:
+            low = byte & -byte
+            yield base + low.bit_length() - 1
+            byte ^= low
+
+
+class BitTest:
+    """O(1) membership tests against a bitset (shifting a big int costs O(size))"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, mask: int):
+        self._data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+
+    def __contains__(self, ordinal: int) -> bool:
+        index = ordinal >> 3
+        return index < len(self._data) and bool(self._data[index] >> (ordinal & 7) & 1)
@@ -0,0 +1,65 @@
+import gzip
+from typing import Dict, Iterable, Optional
+
+# Optional: brotli is only used when the package is installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+# Server preference when the client accepts several encodings equally
+ENCODING_PREFERENCE = ("br", "gzip")
+
+
+def compress_variants(body: bytes) -> Dict[str, bytes]:
+    """Build every supported compressed variant of a body (content-encoding -> bytes)"""
+    variants: Dict[str, bytes] = {}
+    if len(body) < MIN_COMPRESS_SIZE:
+        return variants
+
+    # mtime=0 keeps the output deterministic for identical input
+    gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+    if len(gzipped) < len(body):
+        variants["gzip"] = gzipped
+
+    if brotli is not None:
+        brotlied = brotli.compress(body, mode=brotli.MODE_TEXT, quality=11)
+        if len(brotlied) < len(body):
+            variants["br"] = brotlied
+
+    return variants
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """Pick a content-encoding from Accept-Encoding, or None for identity"""
+    if not accept_encoding:
+        return None
+
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[token] = quality
+
+    best: Optional[str] = None
+    best_quality = 0.0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in available:
+            continue
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
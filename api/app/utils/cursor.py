@@ -0,0 +1,31 @@
+import base64
+import binascii
+import hashlib
+import json
+from typing import Any, Tuple
+
+# Opaque page cursors: base64url JSON of the data version, a digest of the search
+# parameters and the sort key of the last result returned
+
+
+def digest(params: Any) -> str:
+    """Short fingerprint of the parameters a cursor was issued for"""
+    return hashlib.blake2b(repr(params).encode("utf-8"), digest_size=6).hexdigest()
+
+
+def encode_cursor(version: int, scope: str, key: tuple) -> str:
+    payload = json.dumps([version, scope, list(key)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(value: str) -> Tuple[int, str, tuple]:
+    """(version, scope, key) of a cursor; ValueError if it was not made by encode_cursor"""
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        version, scope, key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise ValueError("malformed cursor")
+    if not isinstance(version, int) or not isinstance(scope, str) or not isinstance(key, list) or not key \
+            or not all(isinstance(part, (int, float)) and not isinstance(part, bool) for part in key):
+        raise ValueError("malformed cursor")
+    return version, scope, tuple(key)
@@ -0,0 +1,117 @@
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from app.utils.compression import compress_variants, negotiate_encoding
+
+# Clients may store responses but must revalidate them before reuse
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag from a content hash of the encoded body"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+class EncodedBody:
+    """An encoded response body with its ETag and precompressed variants"""
+
+    def __init__(self, body: bytes, compress: bool = True):
+        self.body = body
+        self.etag = make_etag(body)
+        # content-encoding -> compressed bytes, built once per body
+        self.variants: Dict[str, bytes] = compress_variants(body) if compress else {}
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        # Each encoding is a different representation, so it needs its own strong ETag
+        if encoding is None:
+            return self.etag
+        return f'{self.etag[:-1]}-{encoding}"'
+
+
+def http_date(timestamp: float) -> str:
+    """Format a unix timestamp as an HTTP date (RFC 7231)"""
+    return formatdate(timestamp, usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore any W/ prefix
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[float] = None) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the current validators"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 7232 §6)
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since is None or since.tzinfo is None:
+        return False
+    # HTTP dates have one second resolution
+    return int(last_modified) <= since.timestamp()
+
+
+def conditional_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    last_modified: Optional[float] = None,
+    media_type: str = "application/json",
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Return the body with validators, or an empty 304 when the client copy is fresh"""
+    response_headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        response_headers["Last-Modified"] = http_date(last_modified)
+    if headers:
+        response_headers.update(headers)
+
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=response_headers)
+    return Response(content=body, media_type=media_type, headers=response_headers)
+
+
+def encoded_response(
+    request: Request,
+    encoded: EncodedBody,
+    last_modified: Optional[float] = None,
+    media_type: str = "application/json",
+) -> Response:
+    """Conditional response that serves the best precompressed variant the client accepts"""
+    headers: Dict[str, str] = {}
+    encoding = None
+    if encoded.variants:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"), encoded.variants)
+
+    if encoding is None:
+        return conditional_response(request, encoded.body, encoded.etag, last_modified, media_type, headers)
+
+    headers["Content-Encoding"] = encoding
+    return conditional_response(
+        request,
+        encoded.variants[encoding],
+        encoded.variant_etag(encoding),
+        last_modified,
+        media_type,
+        headers,
+    )
@@ -0,0 +1,66 @@
+"""
+Helpers shared by the benchmark scripts. The scripts run as files
+(python benchmarks/bench_x.py), so this imports as a top-level module.
+"""
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+# City centres synthetic stores are scattered around (lng, lat)
+CITIES = [
+    (121.5654, 25.0330),   # Taipei
+    (139.6917, 35.6895),   # Tokyo
+    (103.8198, 1.3521),    # Singapore
+    (-77.0369, 38.9072),   # Washington DC
+    (-122.4194, 37.7749),  # San Francisco
+]
+
+# Title words and store types of synthetic stores
+WORDS = ["ramen", "sushi", "coffee", "tea", "bar", "bakery", "tokyo", "taipei", "house",
+         "garden", "noodle", "kitchen", "cafe", "golden", "dragon", "street", "market"]
+TYPES = ["ramen", "cafe", "bar", "bakery", "restaurant", "dessert"]
+
+
+def timed_ms(fn: Callable[[], Any], rounds: int) -> float:
+    """Average wall time of fn() in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) * 1000 / rounds
+
+
+def synthetic_features(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Point features clustered around CITIES, titled from WORDS ("Golden Ramen 12")"""
+    rng = random.Random(seed)
+    features = []
+    for i in range(count):
+        lng, lat = rng.choice(CITIES)
+        title = " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 4)))
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lng + rng.gauss(0, 0.08), lat + rng.gauss(0, 0.08)]},
+            "properties": {"id": f"BM_{i}", "title": f"{title} {i}", "type": rng.choice(TYPES)},
+        })
+    return features
+
+
+class Targets:
+    """Latency targets a request states, checked as a benchmark runs; a miss fails the run"""
+
+    def __init__(self):
+        self.missed: List[str] = []
+
+    def check(self, label: str, measured_ms: float, target_ms: float) -> str:
+        """Column for the printed line, recording a miss"""
+        if measured_ms <= target_ms:
+            return f"(target {target_ms:.4g} ms: ok)"
+        self.missed.append(f"{label}: {measured_ms:.3f} ms, target {target_ms:.4g} ms")
+        return f"(target {target_ms:.4g} ms: MISSED)"
+
+    def finish(self):
+        """Exit non-zero when any target was missed"""
+        for miss in self.missed:
+            print(f"MISSED {miss}")
+        if self.missed:
+            sys.exit(1)
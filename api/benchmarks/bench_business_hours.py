@@ -0,0 +1,83 @@
+"""
+Open-status checks from compiled UTC weekly tables against converting and parsing per check.
+
+A check is a table lookup, not a time zone conversion: bulk status for every store
+must take under 1/CONVERT_RATIO of converting and parsing each store's hours.
+
+Run from the api directory:
+    python benchmarks/bench_business_hours.py
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.business_hours import DAYS, HoursEngine, parse_clock
+from _common import Targets, timed_ms
+
+SIZES = (1_000, 100_000)
+ZONES = ["Asia/Taipei", "Asia/Tokyo", "America/New_York", "Asia/Singapore", "America/Los_Angeles"]
+ROUNDS = 5
+CONVERT_RATIO = 2
+
+
+def synthetic_blocks(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    blocks = []
+    for _ in range(count):
+        opening = rng.choice(["08:00", "1000", "11:30", "17:00"])
+        closing = rng.choice(["14:00", "2100", "23:30", "02:00"])
+        hours = {day: [] if rng.random() < 0.15 else [{"start": opening, "end": closing}] for day in DAYS}
+        blocks.append({"timezone": rng.choice(ZONES), "24hr": rng.random() < 0.02,
+                       "holiday": ["0101"] if rng.random() < 0.3 else [], "hours": hours})
+    return blocks
+
+
+def linear_is_open(block, at: datetime) -> bool:
+    """Convert to shop time and parse the day's hours on every check"""
+    local = at.astimezone(ZoneInfo(block["timezone"]))
+    if block["24hr"]:
+        return local.strftime("%m%d") not in block["holiday"]
+    minute = local.hour * 60 + local.minute
+    for back in (0, 1):
+        day = local - timedelta(days=back)
+        if day.strftime("%m%d") in block["holiday"]:
+            continue
+        for interval in block["hours"][DAYS[day.weekday()]]:
+            start, end = parse_clock(interval["start"]), parse_clock(interval["end"])
+            if end <= start:
+                end += 1440
+            if start <= minute + back * 1440 < end:
+                return True
+    return False
+
+
+def main():
+    targets = Targets()
+    now = datetime.now(timezone.utc)
+    for size in SIZES:
+        blocks = synthetic_blocks(size)
+        features = [{"properties": {"id": f"BM_{i}"}} for i in range(size)]
+        start = time.perf_counter()
+        engine = HoursEngine(features, blocks)
+        build_s = time.perf_counter() - start
+        ids = [f"BM_{i}" for i in range(size)]
+
+        linear_ms = timed_ms(lambda: [linear_is_open(block, now) for block in blocks], ROUNDS)
+        status_ms = timed_ms(lambda: engine.status(ids, now), ROUNDS)
+        # A new minute each round, so the cached mask is not reused
+        minutes = iter(range(ROUNDS * 2))
+        mask_ms = timed_ms(lambda: engine.open_mask(now + timedelta(minutes=next(minutes))), ROUNDS)
+        check = targets.check(f"{size} status", status_ms, linear_ms / CONVERT_RATIO)
+        print(f"{size:>7} stores: build {build_s:.2f} s  per-check convert {linear_ms:9.2f} ms  "
+              f"tables {status_ms:9.2f} ms  open mask {mask_ms:9.2f} ms  "
+              f"({engine.open_mask(now).bit_count()} open)  {check}")
+    targets.finish()
+
+
+if __name__ == "__main__":
+    main()
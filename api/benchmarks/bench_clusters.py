@@ -0,0 +1,39 @@
+"""
+Build and query benchmark for the server-side point cluster index.
+
+Run from the api directory:
+    python benchmarks/bench_clusters.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.point_clusters import ClusterIndex
+from _common import synthetic_features, timed_ms
+
+SIZES = (10_000, 100_000)
+QUERY_ROUNDS = 50
+
+WORLD = (-180.0, -90.0, 180.0, 90.0)
+TAIPEI = (121.45, 24.95, 121.65, 25.15)
+
+
+def main():
+    for size in SIZES:
+        features = synthetic_features(size)
+        start = time.perf_counter()
+        index = ClusterIndex(features)
+        build_s = time.perf_counter() - start
+        print(f"\n{size} points: build {build_s:.2f} s (once per data version)")
+
+        for zoom in (0, 4, 8, 12, 16):
+            for name, bbox in (("world", WORLD), ("taipei", TAIPEI)):
+                results = index.get_clusters(bbox, zoom)
+                query_ms = timed_ms(lambda: index.get_clusters(bbox, zoom), QUERY_ROUNDS)
+                print(f"  z{zoom:<2} {name:<7} {len(results):>7} items  {query_ms:8.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
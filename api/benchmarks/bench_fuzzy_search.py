@@ -0,0 +1,53 @@
+"""
+Typo-tolerant search through the trigram index against a pairwise edit-distance
+scan of every title word.
+
+The index must not degrade into that scan: at 100k stores each fuzzy search has
+to take under a tenth of the scan's time.
+
+Run from the api directory:
+    python benchmarks/bench_fuzzy_search.py
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.fuzzy_index import edit_distance, max_distance
+from app.services.search_index import SearchIndex
+from app.services.text_normalize import normalize
+from _common import Targets, synthetic_features, timed_ms
+
+SIZES = (10_000, 100_000)
+# Misspellings of the synthetic words, and a miss
+QUERIES = ("ramne", "nodle kitchen", "tokio gardn", "xqzv")
+LIMIT = 50
+ROUNDS = 5
+SCAN_RATIO = 10
+
+
+def pairwise_scan(titles, q: str):
+    """Titles with every query word within edit distance of one of their words"""
+    words = normalize(q).split()
+    return [ordinal for ordinal, title in enumerate(titles)
+            if all(any(edit_distance(word, title_word, max_distance(word)) is not None
+                       for title_word in title.split()) for word in words)]
+
+
+def main():
+    targets = Targets()
+    for size in SIZES:
+        features = synthetic_features(size)
+        index = SearchIndex(features)
+        print(f"\n{size} stores")
+        for q in QUERIES:
+            hits = len(index.score(q, fuzzy=True))
+            scan_ms = timed_ms(lambda: pairwise_scan(index.titles, q), 1)
+            index_ms = timed_ms(lambda: index.search(q, limit=LIMIT, fuzzy=True), ROUNDS)
+            check = targets.check(f"{size} {q!r}", index_ms, scan_ms / SCAN_RATIO) if size == SIZES[-1] else ""
+            print(f"  {q!r:<15} {hits:>7} hits  pairwise {scan_ms:9.3f} ms  index {index_ms:9.3f} ms  {check}")
+    targets.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Compression ratio and latency benchmark for precompressed map responses.
+
+Run from the api directory:
+    python benchmarks/bench_map_compression.py
+"""
+import gzip
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.map_cache import MAP_PATH, encode_json
+from app.utils.compression import brotli, compress_variants, negotiate_encoding
+from _common import timed_ms
+
+ROUNDS = 200
+
+
+def bench_file(path: Path):
+    raw = path.read_bytes()
+    try:
+        body = encode_json(json.loads(raw))
+    except ValueError:
+        # Broken files are still worth measuring as plain bytes
+        body = raw
+
+    build_ms = timed_ms(lambda: compress_variants(body), rounds=5)
+    variants = compress_variants(body)
+
+    # Per request: precompressed lookup vs compressing on the fly
+    precompressed_ms = timed_ms(lambda: variants.get(negotiate_encoding("gzip, deflate, br", variants)), ROUNDS)
+    on_the_fly_ms = timed_ms(lambda: gzip.compress(body, compresslevel=6), ROUNDS)
+
+    print(f"\n{path.name}")
+    print(f"  {'file on disk':<20} {len(raw):>9} B")
+    print(f"  {'encoded identity':<20} {len(body):>9} B")
+    for encoding, data in variants.items():
+        print(f"  {encoding:<20} {len(data):>9} B  ratio {len(body) / len(data):5.2f}x")
+    print(f"  {'build variants':<20} {build_ms:>9.3f} ms (once per data version)")
+    print(f"  {'serve precompressed':<20} {precompressed_ms:>9.4f} ms/request")
+    print(f"  {'gzip on the fly':<20} {on_the_fly_ms:>9.4f} ms/request")
+
+
+def main():
+    print(f"brotli available: {brotli is not None}")
+    for path in sorted(MAP_PATH.glob("*.json")):
+        bench_file(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Time-to-first-byte and peak RSS of the NDJSON feature stream vs. loading the whole file.
+
+Run from the api directory:
+    python benchmarks/bench_ndjson_stream.py [--sizes 10000,100000,1000000] [--baseline]
+
+Each measurement runs in a fresh interpreter so ru_maxrss reflects only that run.
+"""
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(API_DIR))
+
+DEFAULT_SIZES = "10000,100000,1000000"
+
+
+def write_collection(path: Path, count: int, seed: int = 7):
+    """Write a pretty-printed FeatureCollection shaped like stores.json, without holding it in memory"""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{\n  "type": "FeatureCollection",\n  "features": [\n')
+        for i in range(count):
+            feature = {
+                "type": "Feature",
+                "license": True,
+                "geometry": {"type": "Point", "coordinates": [rng.uniform(-180, 180), rng.uniform(-85, 85)]},
+                "properties": {
+                    "id": f"BM_{i:08d}",
+                    "title": f"Benchmark Store {i}",
+                    "type": rng.choice(["cafe", "bar", "ramen", "taco"]),
+                    "layout": "food",
+                    "storetag": ["bar"],
+                    "producttag": ["cocktail"],
+                    "description": "Lorem ipsum dolor sit amet " * 4,
+                },
+            }
+            f.write("    " + json.dumps(feature, ensure_ascii=False) + (",\n" if i < count - 1 else "\n"))
+        f.write("  ]\n}\n")
+
+
+def measure(mode: str, path: str):
+    """Child process: consume the file in the given mode and print timings as JSON"""
+    from app.services.feature_stream import iter_ndjson
+    from app.services.map_cache import encode_json
+
+    start = time.perf_counter()
+    ttfb = None
+    total = 0
+    if mode == "stream":
+        for chunk in iter_ndjson(Path(path)):
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+            total += len(chunk)
+    else:
+        # What the non-streaming path does: parse and encode everything first
+        with open(path, "r", encoding="utf-8") as f:
+            body = encode_json(json.load(f))
+        ttfb = time.perf_counter() - start
+        total = len(body)
+
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"ttfb_ms": ttfb * 1000, "total_s": elapsed, "bytes": total, "peak_mb": peak_mb}))
+
+
+def run_child(mode: str, path: Path) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", mode, str(path)],
+        check=True, capture_output=True, text=True, cwd=API_DIR,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default=DEFAULT_SIZES)
+    parser.add_argument("--baseline", action="store_true", help="Also measure json.load of the whole file")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure(*args.child)
+        return
+
+    modes = ["stream", "load"] if args.baseline else ["stream"]
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(value) for value in args.sizes.split(",")):
+            path = Path(tmp) / f"features-{size}.json"
+            write_collection(path, size)
+            file_mb = path.stat().st_size / 1024 / 1024
+            print(f"\n{size} features ({file_mb:.1f} MB on disk)")
+            for mode in modes:
+                result = run_child(mode, path)
+                print(
+                    f"  {mode:<7} ttfb {result['ttfb_ms']:10.2f} ms  total {result['total_s']:7.2f} s"
+                    f"  peak RSS {result['peak_mb']:8.1f} MB"
+                )
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main()
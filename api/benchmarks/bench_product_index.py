@@ -0,0 +1,105 @@
+"""
+Product and price range lookups in the product index against scanning every
+store's details and parsing its prices per request.
+
+Lookups are sorted-array ranges and bitset ANDs, so at 100k stores each query
+must take under 1/SCAN_RATIO of the scan.
+
+Run from the api directory:
+    python benchmarks/bench_product_index.py
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.product_index import ProductIndex, parse_price
+from app.utils import bitset
+from app.services.text_index import PRODUCT_SLOTS
+from app.services.text_normalize import tokenize
+from _common import Targets, timed_ms
+
+SIZES = (1_000, 10_000, 100_000)
+# (product, currency, min_price, max_price)
+QUERIES = (
+    ("latte", None, None, None),
+    (None, "TWD", 300, 400),
+    ("taco", "USD", None, 10),
+    ("iced matcha", "JPY", 500, 1000),
+    ("zzz", None, None, None),
+)
+ROUNDS = 5
+SCAN_RATIO = 10
+
+WORDS = ["latte", "matcha", "iced", "taco", "burrito", "mojito", "cocktail", "noodle", "soup", "combo",
+         "chai", "espresso", "beef", "chicken", "spicy", "sweet", "house", "special"]
+# Store id prefix, price format and price range
+COUNTRIES = [("FM", "NT${}", 80, 900), ("JP", "¥{:,}", 300, 5000), ("SG", "S${}", 2, 40), ("US", "${}", 2, 40)]
+
+
+def synthetic_catalog(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    features, details = [], []
+    for i in range(count):
+        country, price_format, low, high = rng.choice(COUNTRIES)
+        features.append({"properties": {"id": f"{country}_{i}", "producttag": [rng.choice(WORDS)]}})
+        details.append({
+            slot: {
+                "name": " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 3))),
+                "price": price_format.format(rng.randint(low, high)) if rng.random() < 0.8 else "",
+                "description": "",
+            }
+            for slot in PRODUCT_SLOTS[:rng.randint(1, 5)]
+        })
+    return features, details
+
+
+def scan(features, details, product, currency, min_price, max_price):
+    """Stores with a matching product, re-reading every menu (last query word as a prefix)"""
+    words = tokenize(product) if product else []
+    found = []
+    for ordinal, store_details in enumerate(details):
+        country = features[ordinal]["properties"]["id"].split("_", 1)[0]
+        for slot in PRODUCT_SLOTS:
+            item = store_details.get(slot)
+            if not item:
+                continue
+            item_words = set(tokenize(item["name"])) | set(tokenize(item["description"]))
+            if words and not (all(word in item_words for word in words[:-1]) and
+                              any(item_word.startswith(words[-1]) for item_word in item_words)):
+                continue
+            if currency is not None:
+                price = parse_price(item["price"], country)
+                if price is None or price[0] != currency:
+                    continue
+                if (min_price is not None and price[1] < min_price) or (max_price is not None and price[1] > max_price):
+                    continue
+            found.append(ordinal)
+            break
+    return found
+
+
+def main():
+    targets = Targets()
+    for size in SIZES:
+        features, details = synthetic_catalog(size)
+        start = time.perf_counter()
+        index = ProductIndex(features, details)
+        build_s = time.perf_counter() - start
+        print(f"\n{size} stores, {index.size} products: index build {build_s:.2f} s (once per data load)")
+        for query in QUERIES:
+            stores = index.store_mask(index.match(*query))
+            found = scan(features, details, *query)
+            assert found == list(bitset.iter_ordinals(stores))
+            scan_ms = timed_ms(lambda: scan(features, details, *query), 1)
+            index_ms = timed_ms(lambda: index.store_mask(index.match(*query)), ROUNDS)
+            check = targets.check(f"{size} {query}", index_ms, scan_ms / SCAN_RATIO) if size == SIZES[-1] else ""
+            print(f"  {str(query):<35} {stores.bit_count():>7} stores  scan {scan_ms:9.3f} ms  index {index_ms:9.3f} ms"
+                  f"  {check}")
+    targets.finish()
+
+
+if __name__ == "__main__":
+    main()
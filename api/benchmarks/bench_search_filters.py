@@ -0,0 +1,86 @@
+"""
+Filtered browse (no query) with bitset filters against the original per-feature filters.
+
+Filtered browse has to stay cheap at 100k stores with many tags: filtering and
+listing a page must take under TARGET_MS there. Facet counting is reported beside
+it without a target.
+
+Run from the api directory:
+    python benchmarks/bench_search_filters.py
+"""
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.search_index import SearchIndex
+from _common import Targets, synthetic_features, timed_ms
+
+SIZES = (10_000, 100_000)
+TAG_COUNT = 500
+LIMIT = 50
+ROUNDS = 20
+TARGET_MS = 1.0
+
+# (label, type, tags, tags_mode, exclude_tags)
+CASES = [
+    ("type", "cafe", None, "any", None),
+    ("any of 3 tags", None, ["tag1", "tag2", "tag3"], "any", None),
+    ("all of 2 tags", None, ["tag0", "tag1"], "all", None),
+    ("type + tag - exclude", "bar", ["tag0"], "any", ["tag5", "tag6"]),
+]
+
+
+def tagged_features(count: int, seed: int = 42):
+    """Synthetic stores with 1-8 store tags each"""
+    rng = random.Random(seed)
+    # Skewed tag popularity, like real catalogs
+    weights = [1 / (i + 1) for i in range(TAG_COUNT)]
+    features = synthetic_features(count, seed)
+    for feature in features:
+        tags = set(rng.choices(range(TAG_COUNT), weights, k=rng.randint(1, 8)))
+        feature["properties"]["storetag"] = [f"tag{tag}" for tag in sorted(tags)]
+    return features
+
+
+def linear_filter(features, store_type, tags, tags_mode, exclude_tags):
+    """filter_by_type / filter_by_tags as search_stores used to run them, plus the new modes"""
+    results = features
+    if store_type:
+        results = [f for f in results if f.get("properties", {}).get("type", "").lower() == store_type.lower()]
+    if tags:
+        tags_lower = [tag.lower() for tag in tags]
+        check = all if tags_mode == "all" else any
+        results = [f for f in results
+                   if check(tag in [t.lower() for t in f["properties"].get("storetag", [])] for tag in tags_lower)]
+    if exclude_tags:
+        excluded = {tag.lower() for tag in exclude_tags}
+        results = [f for f in results
+                   if not excluded & {t.lower() for t in f["properties"].get("storetag", [])}]
+    return results[:LIMIT]
+
+
+def main():
+    targets = Targets()
+    for size in SIZES:
+        features = tagged_features(size)
+        index = SearchIndex(features)
+        print(f"\n{size} stores, {TAG_COUNT} tags")
+        for label, store_type, tags, tags_mode, exclude_tags in CASES:
+            mask = index.filter_mask(store_type, tags, tags_mode, exclude_tags)
+            matches = mask.bit_count()
+            linear_ms = timed_ms(lambda: linear_filter(features, store_type, tags, tags_mode, exclude_tags), ROUNDS)
+            bitset_ms = timed_ms(lambda: index.search(
+                None, index.filter_mask(store_type, tags, tags_mode, exclude_tags), LIMIT), ROUNDS)
+            facets_ms = timed_ms(lambda: index.search(
+                None, index.filter_mask(store_type, tags, tags_mode, exclude_tags), LIMIT,
+                facets=index.facet_counts()), ROUNDS)
+            check = targets.check(f"{size} {label}", bitset_ms, TARGET_MS) if size == SIZES[-1] else ""
+            print(f"  {label:<22} {matches:>7} matches  linear {linear_ms:8.3f} ms  "
+                  f"bitset {bitset_ms:8.3f} ms  bitset+facets {facets_ms:8.3f} ms  {check}")
+    targets.finish()
+
+
+if __name__ == "__main__":
+    main()
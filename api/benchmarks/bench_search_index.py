@@ -0,0 +1,59 @@
+"""
+Query latency of the store search index against the original linear scan.
+
+Latency should stay flat from 36 to 100k stores: a selective query (under 1% of
+the catalog matching) must answer within SELECTIVE_TARGET_MS at every size. Broad
+queries score every hit, so they are reported without a target.
+
+Run from the api directory:
+    python benchmarks/bench_search_index.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.routes.search import calculate_relevance_score
+from app.services.search_index import SearchIndex
+from _common import Targets, synthetic_features, timed_ms
+
+SIZES = (36, 10_000, 100_000)
+QUERIES = ("ramen", "caf", "sushi bar", "a", "zzz", "tokyo coffee")
+LIMIT = 50
+ROUNDS = 20
+SELECTIVE_TARGET_MS = 5.0
+
+
+def linear_search(features, q: str):
+    """The scan search_stores did before the index"""
+    results = []
+    for feature in features:
+        properties = feature.get("properties", {})
+        score = calculate_relevance_score(q, properties.get("title", ""), properties.get("type", ""))
+        if score > 0:
+            results.append((score, feature))
+    results.sort(key=lambda x: x[0], reverse=True)
+    return [feature for _, feature in results][:LIMIT]
+
+
+def main():
+    targets = Targets()
+    for size in SIZES:
+        features = synthetic_features(size)
+        start = time.perf_counter()
+        index = SearchIndex(features)
+        build_s = time.perf_counter() - start
+        print(f"\n{size} stores: index build {build_s:.2f} s (once per data load)")
+
+        for q in QUERIES:
+            hits = len(index.score(q))
+            linear_ms = timed_ms(lambda: linear_search(features, q), ROUNDS)
+            index_ms = timed_ms(lambda: index.search(q, limit=LIMIT), ROUNDS)
+            check = targets.check(f"{size} {q!r}", index_ms, SELECTIVE_TARGET_MS) if hits * 100 < size else ""
+            print(f"  {q!r:<15} {hits:>7} hits  linear {linear_ms:9.3f} ms  index {index_ms:9.3f} ms  {check}")
+    targets.finish()
+
+
+if __name__ == "__main__":
+    main()
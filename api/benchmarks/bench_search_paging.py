@@ -0,0 +1,82 @@
+"""
+Cost of a page of search results: page 1 with and without facet counts, and
+page N resumed after a cursor key against re-ranking everything up to that page
+and slicing it off.
+
+Facet counts come from the query's cached hit bitset, so asking for them must not
+turn off the top-k short-circuit of page 1: an uncached page 1 without facets must
+stay under 1/SHORT_CIRCUIT_RATIO of ranking every tier of the query for broad
+queries with enough title hits to skip the lower tiers. Resuming from a
+cursor must keep page N within PAGE_N_FACTOR times page 1 plus PAGE_N_SLACK_MS.
+
+Run from the api directory:
+    python benchmarks/bench_search_paging.py
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.search_index import TYPE_SCORE_MAX, SearchIndex
+from _common import Targets, synthetic_features, timed_ms
+
+SIZE = 100_000
+QUERIES = (None, "cafe", "tokyo coffee")
+PAGES = (10, 100)
+LIMIT = 20
+ROUNDS = 10
+SHORT_CIRCUIT_RATIO = 2
+PAGE_N_FACTOR = 2
+PAGE_N_SLACK_MS = 1.0
+
+
+def cursor_before(index: SearchIndex, q, page: int):
+    """Sort key of the last result of page - 1, as a client would hold it"""
+    after = None
+    for _ in range(page - 1):
+        after = index.ranked(q, limit=LIMIT, after=after)[-1][0]
+    return after
+
+
+def cold(index: SearchIndex, fn):
+    """fn() run without the query's hits cached by an earlier request"""
+    def run():
+        index._score_cache.clear()
+        return fn()
+    return run
+
+
+def main():
+    targets = Targets()
+    index = SearchIndex(synthetic_features(SIZE))
+    print(f"{SIZE} stores, {LIMIT} per page")
+    for q in QUERIES:
+        hits = len(index.search(q))
+        plain_ms = timed_ms(cold(index, lambda: index.ranked(q, limit=LIMIT)), ROUNDS)
+        full_ms = timed_ms(lambda: index.ranked(q)[:LIMIT], ROUNDS)
+        faceted_ms = timed_ms(cold(index, lambda: index.ranked(q, limit=LIMIT, facets=index.facet_counts())), ROUNDS)
+        warm_ms = timed_ms(lambda: index.ranked(q, limit=LIMIT, facets=index.facet_counts()), ROUNDS)
+        # A page of title hits above every lower tier skips scoring them, which pays off
+        # on broad queries (over 1% of the catalog) where the tiers are large
+        short_circuits = q is not None and hits * 100 >= SIZE and \
+            sum(1 for score in index._title_scores(q).values() if score > TYPE_SCORE_MAX) >= LIMIT
+        check = targets.check(f"{q!r} page 1", plain_ms, full_ms / SHORT_CIRCUIT_RATIO) if short_circuits else ""
+        print(f"  {q!r:<15} {hits:>7} hits  page 1: all tiers {full_ms:8.3f} ms  plain {plain_ms:8.3f} ms"
+              f"  faceted cold {faceted_ms:8.3f} ms  warm {warm_ms:8.3f} ms  {check}")
+
+        page_1_ms = timed_ms(lambda: index.ranked(q, limit=LIMIT), ROUNDS)
+        for page in PAGES:
+            if LIMIT * page > hits:
+                continue
+            after = cursor_before(index, q, page)
+            slice_ms = timed_ms(lambda: index.search(q, limit=LIMIT * page)[-LIMIT:], ROUNDS)
+            cursor_ms = timed_ms(lambda: index.ranked(q, limit=LIMIT, after=after), ROUNDS)
+            assert [o for _, o in index.ranked(q, limit=LIMIT, after=after)] == \
+                index.search(q, limit=LIMIT * page)[-LIMIT:]
+            check = targets.check(f"{q!r} page {page}", cursor_ms, page_1_ms * PAGE_N_FACTOR + PAGE_N_SLACK_MS)
+            print(f"  {'':<15} page {page:>4}  slice {slice_ms:9.3f} ms  cursor {cursor_ms:9.3f} ms  {check}")
+    targets.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Autocomplete latency of SearchIndex.suggest against the original substring scan.
+
+The top 10 must come back well under a millisecond at 100k titles: every
+keystroke prefix, infix and miss is checked against TARGET_MS.
+
+Run from the api directory:
+    python benchmarks/bench_suggestions.py
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.search_index import SearchIndex
+from _common import Targets, synthetic_features, timed_ms
+
+SIZES = (10_000, 100_000)
+# Keystroke-by-keystroke prefixes, plus infix-only and miss cases
+QUERIES = ("t", "to", "tok", "toky", "tokyo g", "arden", "oodle 4", "xq")
+ROUNDS = 50
+TARGET_MS = 1.0
+
+
+def linear_suggest(features, q: str):
+    """The scan /suggestions did before the index"""
+    query_lower = q.lower().strip()
+    suggestions = []
+    for feature in features:
+        title = feature.get("properties", {}).get("title", "")
+        title_lower = title.lower()
+        if query_lower in title_lower:
+            score = 2.0 if title_lower.startswith(query_lower) else 1.0
+            suggestions.append((score, title))
+    suggestions.sort(key=lambda x: x[0], reverse=True)
+    return [title for _, title in suggestions][:10]
+
+
+def main():
+    targets = Targets()
+    for size in SIZES:
+        features = synthetic_features(size)
+        index = SearchIndex(features)
+        print(f"\n{size} titles")
+        for q in QUERIES:
+            linear_ms = timed_ms(lambda: linear_suggest(features, q), 5)
+            index_ms = timed_ms(lambda: index.suggest(q), ROUNDS)
+            check = targets.check(f"{size} {q!r}", index_ms, TARGET_MS) if size == SIZES[-1] else ""
+            print(f"  {q!r:<10} {len(index.suggest(q)):>3} shown  linear {linear_ms:9.3f} ms  "
+                  f"index {index_ms:7.3f} ms  {check}")
+    targets.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Full-text (BM25F) search over store details against scanning every details text.
+
+Scoring only walks the postings of the query terms, so at 100k stores a search
+must take under 1/SCAN_RATIO of tokenizing and scanning every store's text.
+
+Run from the api directory:
+    python benchmarks/bench_text_index.py
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.text_normalize import tokenize
+from app.services.text_index import FullTextIndex, detail_fields
+from _common import Targets, timed_ms
+
+SIZES = (1_000, 10_000, 100_000)
+QUERIES = ("burrito", "mojito", "iced latte", "the", "zzz")
+ROUNDS = 5
+LIMIT = 50
+SCAN_RATIO = 10
+
+# Common words plus a long tail, like real menus and descriptions
+WORDS = ["coffee", "latte", "iced", "burrito", "taco", "mojito", "cocktail", "noodle", "soup", "spicy",
+         "sweet", "the", "with", "and", "fresh", "house", "special", "grilled", "chicken", "beef"]
+TAIL = [f"word{i}" for i in range(5000)]
+STREETS = ["Main St", "Section 3, Tingzhou Rd", "Market Street", "Orchard Rd", "Shibuya"]
+
+
+def synthetic_details(count: int, seed: int = 42):
+    rng = random.Random(seed)
+
+    vocabulary = WORDS + TAIL
+    # Zipf-like: the listed words are common, the tail rare
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    def sentence(low, high):
+        return " ".join(rng.choices(vocabulary, weights, k=rng.randint(low, high)))
+
+    return [{
+        "description": sentence(8, 25),
+        "address": f"No. {i}, {rng.choice(STREETS)}",
+        **{f"product{slot}": {"name": sentence(1, 3), "description": sentence(4, 12), "price": ""}
+           for slot in range(1, 6)},
+    } for i in range(count)]
+
+
+def linear_search(texts, q: str):
+    """Tokenize every store's text per query and keep those containing a query word"""
+    words = set(tokenize(q))
+    return [ordinal for ordinal, text in enumerate(texts) if words & set(tokenize(text))][:LIMIT]
+
+
+def main():
+    targets = Targets()
+    for size in SIZES:
+        details = synthetic_details(size)
+        fields = [detail_fields(store) for store in details]
+        texts = [" ".join(store.values()) for store in fields]
+
+        start = time.perf_counter()
+        index = FullTextIndex()
+        for ordinal, store in enumerate(fields):
+            index.add(ordinal, store)
+        index.finish()
+        build_s = time.perf_counter() - start
+        print(f"\n{size} stores: index build {build_s:.2f} s, {len(index.postings)} terms")
+
+        for q in QUERIES:
+            hits = len(index.score(q))
+            linear_ms = timed_ms(lambda: linear_search(texts, q), 1)
+            index_ms = timed_ms(lambda: sorted(index.score(q).items(), key=lambda item: -item[1])[:LIMIT], ROUNDS)
+            check = targets.check(f"{size} {q!r}", index_ms, linear_ms / SCAN_RATIO) if size == SIZES[-1] else ""
+            print(f"  {q!r:<13} {hits:>7} hits  scan {linear_ms:9.3f} ms  bm25 {index_ms:9.3f} ms  {check}")
+    targets.finish()
+
+
+if __name__ == "__main__":
+    main()
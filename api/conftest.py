@@ -0,0 +1 @@
+# Lets tests import app the way the server runs it, from the api directory
@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes.search import router
+from app.services.business_hours import HoursEngine
+
+app = FastAPI()
+app.include_router(router, prefix="/api/search")
+client = TestClient(app)
+
+OUT_OF_RANGE = ("9999-12-31T23:59:00-12:00", "0001-01-01T00:00:00+14:00")
+EDGES = ("9999-12-28T00:00:00+00:00", "0001-01-04T00:00:00+00:00")
+
+
+def store_ids(count=5):
+    payload = client.get("/api/search", params={"limit": count}).json()
+    return [result["id"] for result in payload["results"]]
+
+
+@pytest.mark.parametrize("at", OUT_OF_RANGE)
+def test_open_at_out_of_range_is_rejected(at):
+    response = client.get("/api/search", params={"open_at": at})
+    assert response.status_code == 400
+    response = client.post("/api/search/open-status", json={"ids": store_ids(), "at": at})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("at", EDGES)
+def test_open_at_near_the_range_edges(at):
+    assert client.get("/api/search", params={"open_at": at}).status_code == 200
+    response = client.post("/api/search/open-status", json={"ids": store_ids(), "at": at})
+    assert response.status_code == 200
+
+
+SUNDAY_HOURS = {"timezone": "America/New_York", "hours": {"Sunday": [{"start": "09:00", "end": "17:00"}]}}
+
+
+def utc(text):
+    return datetime.fromisoformat(text).replace(tzinfo=timezone.utc)
+
+
+# Loaded near the spring-forward (offsets from the precomputed transitions) and years
+# before it (offsets from zoneinfo)
+@pytest.mark.parametrize("now", (utc("2026-02-01T00:00:00"), utc("2020-01-01T00:00:00")))
+def test_open_hours_follow_local_time_across_dst(now):
+    engine = HoursEngine([{"properties": {"id": "US_1"}}], [SUNDAY_HOURS], now=now)
+    cases = {
+        # 2026-03-01, EST (UTC-5): 09:00 local is 14:00 UTC
+        "2026-03-01T13:59:00": False,
+        "2026-03-01T14:00:00": True,
+        # 2026-03-08, EDT (UTC-4) from 02:00 local: 09:00 local is 13:00 UTC
+        "2026-03-08T12:59:00": False,
+        "2026-03-08T13:00:00": True,
+        "2026-03-08T20:59:00": True,
+        "2026-03-08T21:00:00": False,
+        # 2026-11-01, back to EST from 02:00 local
+        "2026-11-01T13:30:00": False,
+        "2026-11-01T21:30:00": True,
+    }
+    for at, expected in cases.items():
+        assert engine.is_open(0, utc(at)) is expected, at
+        assert engine.status(["US_1"], utc(at)) == {"US_1": expected}
+        assert engine.open_mask(utc(at)) == (1 if expected else 0)
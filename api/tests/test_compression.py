@@ -0,0 +1,50 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes.map import router
+from app.utils.compression import MIN_COMPRESS_SIZE, brotli, compress_variants, negotiate_encoding
+
+app = FastAPI()
+app.include_router(router, prefix="/api")
+client = TestClient(app)
+
+BOTH = ("br", "gzip")
+
+
+def test_negotiation_follows_q_values_then_server_preference():
+    assert negotiate_encoding(None, BOTH) is None
+    assert negotiate_encoding("identity", BOTH) is None
+    assert negotiate_encoding("gzip, br", BOTH) == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5", BOTH) == "gzip"
+    assert negotiate_encoding("br;q=0, gzip", BOTH) == "gzip"
+    assert negotiate_encoding("br", ("gzip",)) is None
+    assert negotiate_encoding("*", ("gzip",)) == "gzip"
+    assert negotiate_encoding("*, gzip;q=0", BOTH) == "br"
+    assert negotiate_encoding("gzip;q=oops", BOTH) is None
+
+
+def test_small_bodies_are_not_compressed():
+    assert compress_variants(b"x" * (MIN_COMPRESS_SIZE - 1)) == {}
+    assert "gzip" in compress_variants(b"x" * MIN_COMPRESS_SIZE)
+
+
+def test_each_variant_is_its_own_representation():
+    identity = client.get("/api/map/meta.json", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["vary"] == "Accept-Encoding"
+
+    gzipped = client.get("/api/map/meta.json", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.content == identity.content
+    assert gzipped.headers["etag"] != identity.headers["etag"]
+
+    # A validator only matches the encoding it was issued for
+    headers = {"Accept-Encoding": "gzip", "If-None-Match": identity.headers["etag"]}
+    assert client.get("/api/map/meta.json", headers=headers).status_code == 200
+    headers["If-None-Match"] = gzipped.headers["etag"]
+    assert client.get("/api/map/meta.json", headers=headers).status_code == 304
+
+
+def test_brotli_is_preferred_when_installed():
+    response = client.get("/api/map/meta.json", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == ("br" if brotli is not None else "gzip")
@@ -0,0 +1,33 @@
+from app.services.fuzzy_index import edit_distance
+from app.services.search_index import SearchIndex
+
+
+def stores():
+    return SearchIndex([
+        {"properties": {"id": "JP_1", "title": "Ichiran Ramen", "type": "ramen"}},
+        {"properties": {"id": "US_1", "title": "Blue Bottle Coffee", "type": "cafe"}},
+        {"properties": {"id": "US_2", "title": "Taco Stand", "type": "restaurant"}},
+    ])
+
+
+def test_edit_distance_counts_swaps_once_and_stops_at_the_limit():
+    assert edit_distance("cofee", "coffee", 1) == 1
+    assert edit_distance("cofefe", "coffee", 1) == 1
+    assert edit_distance("cfoefe", "coffee", 1) is None
+    assert edit_distance("cof", "coffee", 1, prefix=True) == 0
+
+
+def test_misspelled_title_word_matches_only_with_fuzzy():
+    index = stores()
+    assert index.search("ichrian") == []
+    assert index.search("ichrian", fuzzy=True) == [0]
+    assert index.search("bottel coffe", fuzzy=True) == [1]
+
+
+def test_exact_matches_outrank_fuzzy_ones_and_short_words_stay_exact():
+    index = SearchIndex([
+        {"properties": {"id": "A", "title": "Tako Bar", "type": "restaurant"}},
+        {"properties": {"id": "B", "title": "Taco Stand", "type": "restaurant"}},
+    ])
+    assert index.search("taco", fuzzy=True) == [1, 0]
+    assert stores().search("tca", fuzzy=True) == []
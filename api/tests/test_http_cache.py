@@ -0,0 +1,41 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes.map import router as map_router
+from app.routes.search import router as search_router
+
+app = FastAPI()
+app.include_router(map_router, prefix="/api")
+app.include_router(search_router, prefix="/api/search")
+client = TestClient(app)
+
+PATHS = ("/api/map/meta.json", "/api/search/types", "/api/search/tags")
+
+
+def test_matching_etag_gets_an_empty_304():
+    for path in PATHS:
+        first = client.get(path)
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        for header in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+            again = client.get(path, headers={"If-None-Match": header})
+            assert again.status_code == 304, (path, header)
+            assert again.content == b""
+            assert again.headers["etag"] == etag
+
+
+def test_other_etag_gets_the_body():
+    for path in PATHS:
+        response = client.get(path, headers={"If-None-Match": '"stale"'})
+        assert response.status_code == 200
+        assert response.content
+
+
+def test_if_modified_since_applies_only_without_if_none_match():
+    first = client.get("/api/map/meta.json")
+    last_modified = first.headers["last-modified"]
+    assert client.get("/api/map/meta.json", headers={"If-Modified-Since": last_modified}).status_code == 304
+    early = "Thu, 01 Jan 1970 00:00:00 GMT"
+    assert client.get("/api/map/meta.json", headers={"If-Modified-Since": early}).status_code == 200
+    headers = {"If-Modified-Since": last_modified, "If-None-Match": '"stale"'}
+    assert client.get("/api/map/meta.json", headers=headers).status_code == 200
@@ -0,0 +1,33 @@
+from app.services.product_index import ProductIndex
+from app.utils import bitset
+
+FEATURES = [
+    {"properties": {"id": "US_bar", "title": "Corner Bar", "type": "bar", "producttag": ["cocktail"]}},
+    {"properties": {"id": "US_deli", "title": "Deli", "type": "restaurant", "producttag": []}},
+]
+DETAILS = [
+    {
+        "product1": {"name": "Onion Dip", "description": "With kettle chips", "price": "$12"},
+        "product2": {"name": "Old Fashioned", "description": "Bourbon, sugar and bitters", "price": "$14"},
+    },
+    {
+        "product1": {"name": "Pastrami", "description": "Cocktail sauce on the side", "price": "$18"},
+    },
+]
+
+
+def names(index: ProductIndex, products: int):
+    return [index.names[number] for number in bitset.iter_ordinals(products)]
+
+
+def test_store_tag_does_not_match_every_product():
+    index = ProductIndex(FEATURES, DETAILS)
+    assert names(index, index.match("cocktail", "USD", 10, 20)) == ["Pastrami"]
+    assert names(index, index.match("cocktail")) == ["Pastrami"]
+
+
+def test_name_and_description_words_match():
+    index = ProductIndex(FEATURES, DETAILS)
+    assert names(index, index.match("dip", "USD", 10, 13)) == ["Onion Dip"]
+    assert names(index, index.match("bourb")) == ["Old Fashioned"]
+    assert names(index, index.match("dip", "USD", 13, 20)) == []
@@ -0,0 +1,45 @@
+from app.services.query_cache import QueryCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_older_version_get_misses_without_dropping_entries():
+    cache = QueryCache()
+    cache.put("q", 2, "new")
+    assert cache.get("q", 1) is None
+    assert cache.get("q", 2) == "new"
+    assert cache.stats()["invalidations"] == 0
+
+
+def test_older_version_put_is_ignored():
+    cache = QueryCache()
+    cache.put("q", 2, "new")
+    cache.put("q", 1, "old")
+    assert cache.get("q", 2) == "new"
+
+
+def test_newer_version_drops_older_entries():
+    cache = QueryCache()
+    cache.put("q", 1, "old")
+    assert cache.get("q", 2) is None
+    assert cache.get("q", 1) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_entries_expire_and_evict():
+    clock = FakeClock()
+    cache = QueryCache(max_entries=2, ttl_s=10, clock=clock)
+    cache.put("a", 1, "a")
+    cache.put("b", 1, "b")
+    cache.put("c", 1, "c")
+    assert cache.get("a", 1) is None
+    clock.now = 11
+    assert cache.get("b", 1) is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["expirations"] == 1
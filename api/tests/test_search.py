@@ -0,0 +1,55 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes.search import router
+
+app = FastAPI()
+app.include_router(router, prefix="/api/search")
+client = TestClient(app)
+
+
+def test_limit_zero_returns_no_results():
+    for params in ({}, {"q": "bar"}, {"near": "25.04,121.53", "sort": "distance"}, {"format": "columnar"}):
+        payload = client.get("/api/search", params={**params, "limit": 0}).json()
+        assert payload["count"] == 0
+        assert payload["next_cursor"] is None
+        # Facets still count every match
+        assert payload["facets"]["type"]
+
+
+def test_limit_zero_in_batch():
+    payload = client.post("/api/search/batch", json={"searches": [{"limit": 0}]}).json()
+    assert payload["results"][0]["count"] == 0
+
+
+def test_negative_limit_is_rejected():
+    assert client.get("/api/search", params={"limit": -1}).status_code == 422
+
+
+def result_ids(params):
+    return [result["id"] for result in client.get("/api/search", params=params).json()["results"]]
+
+
+def paged_ids(params, limit):
+    ids, page = [], {**params, "limit": limit}
+    while True:
+        payload = client.get("/api/search", params=page).json()
+        ids.extend(result["id"] for result in payload["results"])
+        if payload["next_cursor"] is None:
+            return ids
+        page["cursor"] = payload["next_cursor"]
+
+
+def test_cursor_pages_join_up_to_one_long_page():
+    for params in ({}, {"q": "bar"}, {"near": "25.04,121.53", "sort": "distance"}, {"type": "cafe"}):
+        full = result_ids({**params, "limit": 1000})
+        assert full
+        for limit in (1, 4):
+            assert paged_ids(params, limit) == full
+
+
+def test_cursor_only_resumes_its_own_search():
+    cursor = client.get("/api/search", params={"q": "bar", "limit": 2}).json()["next_cursor"]
+    assert client.get("/api/search", params={"q": "bar", "limit": 2, "cursor": cursor}).status_code == 200
+    assert client.get("/api/search", params={"q": "cafe", "limit": 2, "cursor": cursor}).status_code == 400
+    assert client.get("/api/search", params={"q": "bar", "limit": 2, "cursor": "garbage"}).status_code == 400
@@ -0,0 +1,72 @@
+import random
+
+from app.services.search_index import SearchIndex
+
+NEAR = (121.5, 25.0)
+
+
+def scattered_features(count=600, seed=1):
+    """Stores around Taipei; one in twenty has no point"""
+    rng = random.Random(seed)
+    features = []
+    for i in range(count):
+        feature = {"properties": {"id": f"S{i}", "title": f"Store {i}", "type": rng.choice(["cafe", "bar"])}}
+        if rng.random() > 0.05:
+            feature["geometry"] = {"type": "Point",
+                                   "coordinates": [NEAR[0] + rng.gauss(0, 0.5), NEAR[1] + rng.gauss(0, 0.5)]}
+        features.append(feature)
+    return features
+
+
+def all_pages(index, query, mask, limit, **kwargs):
+    results, after = [], None
+    while True:
+        page = index.ranked(query, mask, limit, after=after, **kwargs)
+        if not page:
+            return results
+        results.extend(page)
+        after = page[-1][0]
+
+
+def test_distance_pages_join_up_to_the_full_order():
+    index = SearchIndex(scattered_features())
+    for mask in (None, index.filter_mask("bar")):
+        full = index.ranked(None, mask, near=NEAR, sort="distance")
+        for limit in (1, 7, 50):
+            assert all_pages(index, None, mask, limit, near=NEAR, sort="distance") == full
+
+
+def titled_features(count=400, seed=3):
+    words = ["ramen", "sushi", "coffee", "tea", "bar", "tokyo", "taipei", "garden", "cafe"]
+    rng = random.Random(seed)
+    return [{
+        "properties": {"id": f"S{i}", "type": rng.choice(["cafe", "bar", "ramen"]), "storetag": [rng.choice("ab")],
+                       "title": " ".join(rng.choice(words).capitalize() for _ in range(rng.randint(1, 3)))},
+        "geometry": {"type": "Point", "coordinates": [NEAR[0] + rng.random(), NEAR[1] + rng.random()]},
+    } for i in range(count)]
+
+
+def test_query_pages_and_facets_agree_with_the_full_ranking():
+    features = titled_features()
+    for query in ("cafe", "tokyo coffee", "c"):
+        expected_index = SearchIndex(features)
+        mask = expected_index.filter_mask(tags=["a"])
+        full = expected_index.ranked(query, mask)
+        expected_facets = expected_index.facet_counts()
+        for _, ordinal in full:
+            expected_facets.add(ordinal)
+
+        for with_facets in (False, True):
+            # A fresh index each time, so page 1 runs without a cached ranking
+            index = SearchIndex(features)
+            results, after = [], None
+            while True:
+                facets = index.facet_counts() if with_facets else None
+                page = index.ranked(query, mask, 20, facets=facets, after=after)
+                if facets is not None:
+                    assert facets.as_dict() == expected_facets.as_dict()
+                if not page:
+                    break
+                results.extend(page)
+                after = page[-1][0]
+            assert results == full
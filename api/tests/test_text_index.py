@@ -0,0 +1,34 @@
+from app.services.text_index import FullTextIndex
+
+FILLER = {
+    "product": "rice bowl",
+    "product_description": "fresh food",
+    "description": "open kitchen",
+    "address": "main street",
+}
+
+
+def store_with(field: str, text: str):
+    """Fields of equal length everywhere, so only the field's boost tells stores apart"""
+    return {**FILLER, field: text}
+
+
+def test_matches_rank_by_field_weight():
+    index = FullTextIndex()
+    index.add(0, store_with("address", "burrito street"))
+    index.add(1, store_with("description", "burrito kitchen"))
+    index.add(2, store_with("product", "burrito bowl"))
+    index.add(3, store_with("product_description", "burrito food"))
+    index.add(4, FILLER)
+    scores = index.finish().score("burrito")
+    assert sorted(scores, key=lambda ordinal: -scores[ordinal]) == [2, 3, 1, 0]
+
+
+def test_field_matches_add_up_and_repeated_query_words_count_once():
+    index = FullTextIndex()
+    index.add(0, store_with("product", "burrito bowl"))
+    index.add(1, {**store_with("product", "burrito bowl"), "description": "burrito kitchen"})
+    index.add(2, FILLER)
+    scores = index.finish().score("burrito")
+    assert scores[1] > scores[0]
+    assert index.score("burrito burrito") == scores
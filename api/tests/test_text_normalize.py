@@ -0,0 +1,24 @@
+from app.services.search_index import SearchIndex
+from app.services.text_normalize import normalize, tokenize
+
+
+def test_cjk_runs_become_bigrams_next_to_latin_words():
+    assert tokenize("紅燒牛肉麵 noodles") == ["紅燒", "燒牛", "牛肉", "肉麵", "noodles"]
+    assert tokenize("麵") == ["麵"]
+
+
+def test_width_case_and_accents_fold_but_kana_voicing_stays():
+    assert normalize("Ｐàng") == normalize("pang")
+    assert normalize("ｶﾞ") == "ガ"
+    assert normalize("が") != normalize("か")
+
+
+def test_cjk_and_full_width_queries_find_store_titles():
+    index = SearchIndex([
+        {"properties": {"id": "FM_1", "title": "老王紅燒牛肉麵", "type": "restaurant"}},
+        {"properties": {"id": "JP_1", "title": "ラーメン一蘭", "type": "ramen"}},
+        {"properties": {"id": "US_1", "title": "Cafe Ole", "type": "cafe"}},
+    ])
+    assert index.search("牛肉麵") == [0]
+    assert index.search("ﾗｰﾒﾝ") == [1]
+    assert index.search("ＣＡＦÉ") == [2]